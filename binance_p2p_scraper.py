@@ -3,8 +3,8 @@ Binance P2P Scraper para RAGFIN1
 Obtiene tasas de compra/venta USDT en monedas locales
 Mario @ MGA
 """
-import requests
-from typing import Dict, List, Optional
+import ragfin1_http
+from typing import Dict, Optional
 from datetime import datetime
 
 class BinanceP2PScraper:
@@ -42,11 +42,13 @@ class BinanceP2PScraper:
         }
         
         try:
-            response = requests.post(
+            # Búsqueda de anuncios: POST de solo lectura, se puede reintentar
+            response = ragfin1_http.post(
                 self.base_url,
                 json=payload,
                 headers={"Content-Type": "application/json"},
-                timeout=10
+                timeout=10,
+                idempotent=True
             )
             response.raise_for_status()
             data = response.json()
@@ -79,14 +81,28 @@ class BinanceP2PScraper:
         except Exception as e:
             return {"error": f"Binance P2P error: {str(e)}"}
     
-    def compare_with_traditional(self, country: str, amount: float = 1000) -> Dict:
+    def get_sell_rates(self, amount: float = 1000) -> Dict[str, Dict]:
+        """
+        Rate de VENTA de USDT para cada país de currency_map (los que respondieron bien)
+        """
+        rates = {}
+        for country, fiat in self.currency_map.items():
+            sell_rate = self.get_p2p_rate(fiat, "SELL", "USDT", amount)
+            if "error" not in sell_rate:
+                rates[country] = sell_rate
+        return rates
+    
+    def compare_with_traditional(self, country: str, amount: float = 1000,
+                                 sell_rate: Optional[Dict] = None) -> Dict:
         """
         Compara Binance P2P con remesas tradicionales
+        sell_rate: resultado de get_p2p_rate ya obtenido (si no, se consulta)
         """
         fiat = self.currency_map.get(country, country)
         
         # Rate de VENTA de USDT (recibir fiat)
-        sell_rate = self.get_p2p_rate(fiat, "SELL", "USDT", amount)
+        if sell_rate is None:
+            sell_rate = self.get_p2p_rate(fiat, "SELL", "USDT", amount)
         
         if "error" in sell_rate:
             return sell_rate
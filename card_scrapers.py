@@ -4,7 +4,6 @@ Separate scrapers for credit/debit card pricing
 Does NOT touch existing scrapers
 """
 
-import requests
 from typing import Dict, Optional, List, Tuple
 
 # ==================== BASE CARD PREMIUM DATA ====================
@@ -0,0 +1,60 @@
+"""
+RAGFIN1 Answer Cache Check
+Verifica que el churn del cache de endpoints (muchas keys distintas, más que su límite)
+no desaloje las respuestas de Claude persistidas en AnswerCache
+- Mismo archivo SQLite que en producción (tabla aparte) y backend en memoria
+
+Uso: python check_answer_cache.py
+"""
+import sys
+import tempfile
+
+from ragfin1_cache import TTLCache, create_cache_backend
+from ragfin1_rag import AnswerCache
+
+RESPONSE_MAX_ENTRIES = 64
+ANSWERS = 20
+CHURN = RESPONSE_MAX_ENTRIES * 10
+
+
+def check(kind: str, path: str) -> bool:
+    response_backend = create_cache_backend(kind, max_entries=RESPONSE_MAX_ENTRIES, path=path)
+    answer_backend = create_cache_backend(kind, max_entries=ANSWERS * 2, path=path, namespace="answer")
+    response_cache = TTLCache(backend=response_backend)
+    answers = AnswerCache(answer_backend)
+
+    keys = [
+        AnswerCache.make_keys(f"pregunta {i}", "MX", None, "model", 1024, "contexto")
+        for i in range(ANSWERS)
+    ]
+    for i, key in enumerate(keys):
+        answers.set(key, {"success": True, "answer": f"respuesta {i}"})
+
+    # Endpoints cacheados con destination/amount al azar
+    for i in range(CHURN):
+        response_cache.set("best", f"MX:{i}", {"provider": "Wise", "amount": i})
+
+    kept = sum(1 for key in keys if answers.get(key) is not None)
+    responses = response_backend.size()
+    ok = kept == ANSWERS and responses <= RESPONSE_MAX_ENTRIES
+    status = "✅" if ok else "❌"
+    print(f"{status} {kind}: {kept}/{ANSWERS} answers kept after {CHURN} response writes "
+          f"(response cache holds {responses}, limit {RESPONSE_MAX_ENTRIES})")
+    return ok
+
+
+def main() -> int:
+    print("🔍 Checking answer cache isolation...")
+    with tempfile.TemporaryDirectory(prefix="ragfin1_answers_") as tmp_dir:
+        results = [check("memory", None), check("sqlite", f"{tmp_dir}/cache.db")]
+
+    if not all(results):
+        print("\n❌ Response cache churn evicts answers")
+        return 1
+
+    print("\n✅ Answers survive response cache churn")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+RAGFIN1 Pricing Check
+Verifica que quote_amounts() (vectorizado) dé exactamente lo mismo que quote() monto por monto
+para todas las entradas de PRICING_TABLE, incluidos los bordes de cada tramo
+
+Uso: python check_pricing.py
+"""
+import sys
+
+import numpy as np
+
+from ragfin1_pricing import ANY_CORRIDOR, PRICING_TABLE, QUOTE, PricingEngine
+
+RATE = 17.1234567
+
+
+def amounts_for(tiers) -> np.ndarray:
+    caps = [cap for cap, _, _ in tiers if cap is not None]
+    edges = [x for cap in caps for x in (cap - 0.01, cap, cap + 0.01)]
+    return np.unique(np.array([0, 0.5, 1] + edges + list(np.arange(0, 12000, 2.5)), dtype=np.float64))
+
+
+def main() -> int:
+    print("🔍 Checking pricing engine...")
+    engine = PricingEngine()
+    failures = 0
+
+    for (provider, corridor), spec in PRICING_TABLE.items():
+        destination = "MX" if corridor == ANY_CORRIDOR else corridor
+        rate = None if spec["currency"] is None else RATE
+        amounts = amounts_for(spec["tiers"])
+        grid = engine.quote_amounts(provider, destination, amounts, corridor=corridor, rate=rate)
+
+        recipient_key = "recipient_receives" if spec["format"] == QUOTE else "recipient_gets"
+        mismatches = 0
+        for i, amount in enumerate(amounts):
+            quote = engine.quote(provider, "US", destination, float(amount), corridor=corridor, rate=rate)
+            expected = {
+                "fee": quote["fee"],
+                "recipient_receives": quote[recipient_key],
+                "exchange_rate": quote["exchange_rate"]
+            }
+            if "total_cost" in quote:
+                expected["total_cost"] = quote["total_cost"]
+            else:
+                expected["effective_rate"] = quote["effective_rate"]
+
+            for field, value in expected.items():
+                if grid[field][i] != value:
+                    mismatches += 1
+                    if mismatches <= 3:
+                        print(f"   {field} @ {amount}: vector={grid[field][i]!r} scalar={value!r}")
+
+        if mismatches:
+            failures += 1
+            print(f"❌ {provider} / {corridor}: {mismatches} mismatches")
+        else:
+            print(f"✅ {provider} / {corridor} ({len(amounts)} amounts)")
+
+    if failures:
+        print(f"\n❌ {failures} pricing schedule(s) disagree")
+        return 1
+
+    print("\n✅ Vectorized and scalar quotes match")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+RAGFIN1 Query Plan Regression Check
+Ejecuta los read paths de ragfin1_rag.py y ragfin1_db.py sobre una DB temporal,
+captura cada SQL que corren y le pasa EXPLAIN QUERY PLAN
+Falla (exit 1) si algún statement recorre una tabla entera (SCAN, con o sin índice)
+o usa un temp B-tree para ordenar/agrupar, salvo las excepciones justificadas en `cases`
+
+Uso: python check_query_plans.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "query-plan-check")
+
+from ragfin1_cache import MemoryBackend
+from ragfin1_db import RAGFIN1Database, ensure_schema
+from ragfin1_rag import RAGEngine
+
+
+def normalize(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def seed(db: RAGFIN1Database):
+    rows = []
+    for i, destination in enumerate(["MX", "CO", "GT", "SV"]):
+        for j, provider in enumerate(["Wise", "Western Union", "Intermex", "Remitly"]):
+            for amount in [50, 100, 500, 1000, 5000]:
+                rows.append({
+                    "provider": provider,
+                    "origin": "US",
+                    "destination": destination,
+                    "send_amount": amount,
+                    "fee": 1.0 + j,
+                    "exchange_rate": 10.0 + i,
+                    "timestamp": f"2025-01-{1 + j:02d}T00:00:{amount % 60:02d}"
+                })
+    for row in rows:
+        db.insert_corridor_data(row)
+    db.conn.execute("ANALYZE")
+    db.conn.commit()
+
+
+def capture(conn: sqlite3.Connection, fn) -> list:
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        fn()
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE"))]
+
+
+# Excepciones permitidas por caso
+INDEXED = frozenset()
+FULL_READ = frozenset({"SCAN"})
+ONE_OFF = frozenset({"SCAN", "TEMP B-TREE"})
+
+
+def check_plan(conn: sqlite3.Connection, sql: str, allowed: frozenset) -> tuple:
+    """(problemas, detalles permitidos por la excepción del caso)"""
+    problems, exempt = [], []
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        detail = row[3]
+        if "USE TEMP B-TREE" in detail:
+            (exempt if "TEMP B-TREE" in allowed else problems).append(detail)
+        elif detail.startswith("SCAN "):
+            (exempt if "SCAN" in allowed else problems).append(detail)
+    return problems, exempt
+
+
+def legacy_copy(db_path: str, tmp_dir: str) -> sqlite3.Connection:
+    """Copia de la DB sin corridor_aggregates (DB anterior a los agregados): ensure_schema hace el backfill"""
+    conn = sqlite3.connect(os.path.join(tmp_dir, "legacy.db"))
+    # backup API: la DB está en WAL, copiar el archivo perdería lo que no se checkpointeó
+    src = sqlite3.connect(db_path)
+    src.backup(conn)
+    src.close()
+    conn.execute("DROP TRIGGER trg_corridor_aggregates")
+    conn.execute("DROP TABLE corridor_aggregates")
+    conn.commit()
+    return conn
+
+
+def main() -> int:
+    print("🔍 Checking query plans...")
+
+    with tempfile.TemporaryDirectory(prefix="ragfin1_plans_") as tmp_dir:
+        return run_checks(tmp_dir)
+
+
+def run_checks(tmp_dir: str) -> int:
+    db_path = os.path.join(tmp_dir, "plans.db")
+
+    db = RAGFIN1Database(db_path)
+    seed(db)
+    legacy = legacy_copy(db_path, tmp_dir)
+
+    engine = RAGEngine(db_path, cache_backend=MemoryBackend(), answer_backend=MemoryBackend())
+    reader = engine.get_connection()
+
+    # (label, conexión que ejecuta, callable, excepción permitida, por qué)
+    cases = [
+        ("RAGEngine.filter_data()", reader, lambda: engine.filter_data(), FULL_READ,
+         "devuelve todas las filas"),
+        ("RAGEngine.filter_data(destination)", reader, lambda: engine.filter_data(destination="MX", limit=50), INDEXED, None),
+        ("RAGEngine.filter_data(provider)", reader, lambda: engine.filter_data(provider="Wise"), INDEXED, None),
+        ("RAGEngine.filter_data(destination, provider)", reader, lambda: engine.filter_data(destination="MX", provider="Wise", limit=10), INDEXED, None),
+        ("RAGEngine.load_all_data", reader, engine.load_all_data, FULL_READ,
+         "devuelve todas las filas"),
+        ("RAGEngine.get_aggregates()", reader, lambda: engine.get_aggregates(), FULL_READ,
+         "todos los corredores; corridor_aggregates tiene una fila por (destino, provider, bucket)"),
+        ("RAGEngine.get_aggregates(destination)", reader, lambda: engine.get_aggregates(destination="MX"), INDEXED, None),
+        ("RAGEngine.get_aggregates(provider)", reader, lambda: engine.get_aggregates(provider="Wise"), INDEXED, None),
+        ("RAGEngine.get_aggregates(destination, provider)", reader, lambda: engine.get_aggregates(destination="MX", provider="Wise"), INDEXED, None),
+        ("RAGEngine.refresh_snapshot", reader, lambda: engine.refresh_snapshot(force=True), FULL_READ,
+         "el snapshot es una copia de toda la tabla"),
+        ("RAGFIN1Database.get_latest_corridor", db.conn, lambda: db.get_latest_corridor("Wise", "US", "MX"), INDEXED, None),
+        ("RAGFIN1Database.get_latest_corridor(amount)", db.conn, lambda: db.get_latest_corridor("Wise", "US", "MX", 500), INDEXED, None),
+        ("RAGFIN1Database.get_stats", db.conn, db.get_stats, FULL_READ,
+         "conteos sobre toda la tabla (endpoint de admin)"),
+        ("RAGFIN1Database.insert_corridor_data", db.conn, lambda: db.insert_corridor_data({"provider": "Wise", "destination": "MX"}), INDEXED, None),
+        ("ensure_schema (backfill de agregados)", legacy, lambda: ensure_schema(legacy), ONE_OFF,
+         "una sola vez por DB: agrupa toda corridors por un bucket calculado (CASE), sin índice posible"),
+    ]
+
+    failures = 0
+    for label, conn, fn, allowed, reason in cases:
+        # Sin snapshot: los read paths van a SQLite
+        engine.snapshot = None
+        statements = capture(conn, fn)
+
+        if not statements:
+            print(f"❌ {label}: no SQL captured")
+            failures += 1
+            continue
+
+        for sql in statements:
+            problems, exempt = check_plan(conn, sql, allowed)
+            if problems:
+                failures += 1
+                print(f"❌ {label}")
+                print(f"   {normalize(sql)[:120]}")
+                for problem in problems:
+                    print(f"   → {problem}")
+            elif exempt:
+                print(f"✅ {label} (permitido: {'; '.join(exempt)} - {reason})")
+            else:
+                print(f"✅ {label}")
+
+    legacy.close()
+    engine.connections.reset()
+    db.close()
+
+    if failures:
+        print(f"\n❌ {failures} query plan regression(s)")
+        return 1
+
+    print("\n✅ All query plans use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
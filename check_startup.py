@@ -0,0 +1,161 @@
+"""
+RAGFIN1 Startup Check
+Mide el cold start de la API contra el presupuesto de startup_budget.json
+- import main: tiempo acumulado según `python -X importtime` (mediana de N procesos nuevos)
+  y módulos pesados que no se pueden cargar al importar
+- tiempo hasta el primer 200 de /health levantando uvicorn
+Hermético: la app corre contra una copia temporal de la DB (RAGFIN1_DB_PATH, el cache SQLite
+queda al lado) y sin scheduler (RAGFIN1_SCHEDULER=0): no escribe ragfin1_data.db ni sale a la red
+
+Uso: python check_startup.py [runs]
+"""
+import json
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Set, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BUDGET_PATH = os.path.join(ROOT, "startup_budget.json")
+DB_PATH = os.path.join(ROOT, "ragfin1_data.db")
+DEFAULT_RUNS = 5
+HEALTH_TIMEOUT = 30.0
+
+
+def parse_importtime(stderr: str) -> Tuple[Dict[str, Tuple[int, int]], Set[str]]:
+    """module → (self µs, cumulative µs) y el set de módulos importados"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        times[name] = (int(parts[0]), int(parts[1]))
+    return times, set(times)
+
+
+def measure_import(env: Dict[str, str]) -> Tuple[float, Dict[str, Tuple[int, int]], Set[str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+    times, modules = parse_importtime(result.stderr)
+    return times["main"][1] / 1000, times, modules
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_health(env: Dict[str, str]) -> float:
+    """ms desde lanzar uvicorn hasta el primer 200 de /health"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.monotonic() - started < HEALTH_TIMEOUT:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.monotonic() - started) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"/health not ready after {HEALTH_TIMEOUT:.0f}s")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main() -> int:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    with open(BUDGET_PATH) as f:
+        budget = json.load(f)
+
+    with tempfile.TemporaryDirectory(prefix="ragfin1_startup_") as tmp_dir:
+        db_path = os.path.join(tmp_dir, "ragfin1_data.db")
+        if os.path.exists(DB_PATH):
+            # backup API en read-only: incluye lo que esté en el -wal y no escribe la DB real
+            src = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+            dst = sqlite3.connect(db_path)
+            src.backup(dst)
+            dst.close()
+            src.close()
+        env = dict(
+            os.environ,
+            PYTHONDONTWRITEBYTECODE="1",
+            RAGFIN1_DB_PATH=db_path,
+            RAGFIN1_SCHEDULER="0",
+            RAGFIN1_CACHE_BACKEND="sqlite"
+        )
+        env.pop("RAGFIN1_CACHE_PATH", None)
+        return run_checks(runs, budget, env)
+
+
+def run_checks(runs: int, budget: Dict, env: Dict[str, str]) -> int:
+    print(f"🔍 Measuring startup ({runs} runs)...")
+
+    import_ms: List[float] = []
+    forbidden_loaded: Set[str] = set()
+    times: Dict[str, Tuple[int, int]] = {}
+    for _ in range(runs):
+        elapsed, times, modules = measure_import(env)
+        import_ms.append(elapsed)
+        forbidden_loaded |= modules & set(budget["forbidden_imports"])
+
+    health_ms = [measure_first_health(env) for _ in range(runs)]
+
+    import_median = statistics.median(import_ms)
+    health_median = statistics.median(health_ms)
+
+    print("\n📊 Heaviest modules (self time, last run):")
+    for name, (self_us, _) in sorted(times.items(), key=lambda item: -item[1][0])[:10]:
+        print(f"   {self_us / 1000:7.1f} ms  {name}")
+
+    failures = []
+    status = "✅" if import_median <= budget["import_main_ms"] else "❌"
+    print(f"\n{status} import main: {import_median:.0f} ms (budget {budget['import_main_ms']} ms)")
+    if status == "❌":
+        failures.append("import_main_ms")
+
+    status = "✅" if health_median <= budget["first_health_ms"] else "❌"
+    print(f"{status} first 200 on /health: {health_median:.0f} ms (budget {budget['first_health_ms']} ms)")
+    if status == "❌":
+        failures.append("first_health_ms")
+
+    if forbidden_loaded:
+        print(f"❌ Imported eagerly by main: {', '.join(sorted(forbidden_loaded))}")
+        failures.append("forbidden_imports")
+    else:
+        print(f"✅ No eager imports of: {', '.join(budget['forbidden_imports'])}")
+
+    if failures:
+        print(f"\n❌ Startup over budget: {', '.join(failures)}")
+        return 1
+
+    print("\n✅ Startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
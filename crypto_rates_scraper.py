@@ -5,12 +5,41 @@ APIs: CoinGecko (primary) + ExchangeRate-Host (fallback) + Binance (secondary)
 Mario @ MGA
 """
 
-import requests
+import ragfin1_http
+from ragfin1_cache import ThreadSingleFlight
 import json
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Dict, List, Optional
 import time
 
+# TTL por fuente (segundos). Pasado el TTL se sirve el valor viejo y se refresca en background
+SOURCE_TTL = {
+    "coingecko": 60,
+    "exchangerate-host": 300,
+    "binance": 60
+}
+# Más viejo que esto ya no se sirve: se refresca en línea
+STALE_MAX_AGE = 600
+# Tras un fallo de una fuente, no reintentarla antes de esto
+RETRY_AFTER = 30
+# Deadline por fuente (todos los intentos HTTP) y global de get_all_rates
+SOURCE_DEADLINE = {
+    "coingecko": 3.0,
+    "exchangerate-host": 3.0,
+    "binance": 3.0
+}
+RACE_DEADLINE = 4.0
+# Si CoinGecko tarda más que su p95 se lanzan las fuentes de respaldo sin esperarlo
+HEDGE_DEFAULT_DELAY = 1.0
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# Los pares listados en Binance casi no cambian: snapshot de exchangeInfo por un día
+BINANCE_SYMBOLS_TTL = 24 * 3600
+
 class CryptoRatesScraper:
     """
     Scraper de tasas crypto para remesas
@@ -38,6 +67,23 @@ class CryptoRatesScraper:
         # Stablecoins a trackear
         self.stablecoins = ["tether", "usd-coin"]  # USDT, USDC en CoinGecko
         
+        # Cache por (fuente, moneda): {'rates': {coin: entry}, 'fetched_at', 'timestamp'}
+        # Un pedido de un subconjunto de monedas se sirve del superconjunto ya en memoria
+        self._cache: Dict[tuple, Dict] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._refreshing: set = set()
+        # Un burst de lecturas frías/vencidas de la misma fuente hace una sola llamada upstream
+        self._flight = ThreadSingleFlight()
+        self._binance_symbols: Optional[Dict] = None
+        self._latencies = {source: deque(maxlen=LATENCY_WINDOW) for source in SOURCE_TTL}
+        self._pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="crypto-source")
+        self._lock = threading.Lock()
+        self._fetchers = {
+            "coingecko": self.get_coingecko_rates,
+            "exchangerate-host": self.get_exchangerate_host_rates,
+            "binance": self.get_binance_rates
+        }
+        
     def get_coingecko_rates(self, currencies: List[str]) -> Dict:
         """
         Obtiene rates de CoinGecko para USDT y USDC
@@ -53,7 +99,7 @@ class CryptoRatesScraper:
                 "include_24hr_change": "true"
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = ragfin1_http.get(url, params=params, deadline=SOURCE_DEADLINE["coingecko"])
             response.raise_for_status()
             
             data = response.json()
@@ -97,7 +143,7 @@ class CryptoRatesScraper:
                 "symbols": ",".join(currencies)
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = ragfin1_http.get(url, params=params, deadline=SOURCE_DEADLINE["exchangerate-host"])
             response.raise_for_status()
             
             data = response.json()
@@ -119,6 +165,9 @@ class CryptoRatesScraper:
                             "rate": rate_value,
                             "source": "exchangerate-host"
                         }
+            else:
+                # success=false es un error de la fuente, no "no tiene estas monedas"
+                return {}
             
             return rates
             
@@ -135,7 +184,7 @@ class CryptoRatesScraper:
             url = f"{self.binance_base}/ticker/price"
             params = {"symbol": symbol}
             
-            response = requests.get(url, params=params, timeout=10)
+            response = ragfin1_http.get(url, params=params, deadline=SOURCE_DEADLINE["binance"])
             response.raise_for_status()
             
             data = response.json()
@@ -145,60 +194,234 @@ class CryptoRatesScraper:
             # No todos los pares existen en Binance
             return None
     
+    def get_binance_symbols(self) -> Optional[Dict[str, tuple]]:
+        """
+        symbol → (coin, currency) de los pares USDT*/USDC* en TRADING
+        Sale de un snapshot de exchangeInfo (BINANCE_SYMBOLS_TTL); si el refresh falla se usa el anterior
+        """
+        snapshot = self._binance_symbols
+        if snapshot and time.monotonic() - snapshot["fetched_at"] < BINANCE_SYMBOLS_TTL:
+            return snapshot["symbols"]
+        
+        try:
+            url = f"{self.binance_base}/exchangeInfo"
+            response = ragfin1_http.get(url, params={"permissions": "SPOT"}, deadline=SOURCE_DEADLINE["binance"])
+            response.raise_for_status()
+            
+            symbols = {
+                info["symbol"]: (info["baseAsset"], info["quoteAsset"])
+                for info in response.json().get("symbols", [])
+                if info.get("baseAsset") in ("USDT", "USDC") and info.get("status") == "TRADING"
+            }
+            self._binance_symbols = {"symbols": symbols, "fetched_at": time.monotonic()}
+            return symbols
+            
+        except Exception as e:
+            print(f"Error fetching Binance exchangeInfo: {e}")
+            return snapshot["symbols"] if snapshot else None
+    
     def get_binance_rates(self, currencies: List[str]) -> Dict:
         """
-        Obtiene rates de Binance P2P para múltiples monedas
+        Obtiene rates de Binance para múltiples monedas
+        Un solo request multi-símbolo a ticker/price, solo con pares que existen
+        (un símbolo inválido haría fallar el request entero)
         """
+        symbols = self.get_binance_symbols()
+        if symbols is None:
+            return {}
+        
         rates = {
             "USDT": {},
             "USDC": {}
         }
         
-        for currency in currencies:
-            # Intentar obtener rates de Binance
-            for coin in ["USDT", "USDC"]:
-                symbol = f"{coin}{currency}"
-                rate = self.get_binance_rate(symbol)
-                
-                if rate:
-                    rates[coin][currency] = {
-                        "rate": rate,
-                        "source": "binance"
-                    }
+        wanted = [symbol for symbol, (_, currency) in symbols.items() if currency in currencies]
+        if not wanted:
+            return rates
+        
+        try:
+            url = f"{self.binance_base}/ticker/price"
+            params = {"symbols": json.dumps(sorted(wanted), separators=(",", ":"))}
+            
+            response = ragfin1_http.get(url, params=params, deadline=SOURCE_DEADLINE["binance"])
+            response.raise_for_status()
+            
+            for ticker in response.json():
+                coin, currency = symbols[ticker["symbol"]]
+                rates[coin][currency] = {
+                    "rate": float(ticker["price"]),
+                    "source": "binance"
+                }
             
-            # Pequeña pausa para no saturar la API
-            time.sleep(0.1)
+            return rates
+            
+        except Exception as e:
+            print(f"Error fetching Binance rates: {e}")
+            return {}
+    
+    def _fetch_source(self, source: str, currencies: List[str]):
+        """
+        Consulta una fuente y guarda una entrada por moneda (vacía si la fuente no la tiene)
+        Coalescido por (fuente, monedas): los threads que piden lo mismo a la vez esperan
+        la llamada en vuelo y después leen del cache
+        """
+        if source != "binance":
+            # Una sola llamada trae todas: pedir siempre el superconjunto
+            currencies = list(dict.fromkeys(list(self.currency_map) + currencies))
+        
+        key = f"{source}:{','.join(sorted(currencies))}"
+        self._flight.do(key, lambda: self._fetch_and_store(source, currencies))
+    
+    def _fetch_and_store(self, source: str, currencies: List[str]):
+        print(f"🔍 Fetching {source} crypto rates for: {', '.join(currencies)}")
+        started = time.monotonic()
+        rates = self._fetchers[source](currencies)
+        now = time.monotonic()
+        timestamp = datetime.now().isoformat()
+        
+        with self._lock:
+            self._latencies[source].append(now - started)
+            if not rates:
+                # Error de la fuente: se siguen sirviendo las entradas que haya
+                self._failed_at[source] = now
+                return
+            
+            self._failed_at.pop(source, None)
+            # Lo que ya no se puede servir (más viejo que STALE_MAX_AGE) se descarta
+            for key in [key for key, cached in self._cache.items() if now - cached["fetched_at"] > STALE_MAX_AGE]:
+                del self._cache[key]
+            for currency in currencies:
+                self._cache[(source, currency)] = {
+                    "rates": {
+                        coin: coin_rates[currency]
+                        for coin, coin_rates in rates.items()
+                        if currency in coin_rates
+                    },
+                    "fetched_at": now,
+                    "timestamp": timestamp
+                }
+    
+    def _refresh_in_background(self, source: str, currencies: List[str]):
+        with self._lock:
+            if source in self._refreshing:
+                return
+            self._refreshing.add(source)
+        
+        def run():
+            try:
+                self._fetch_source(source, currencies)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(source)
+        
+        threading.Thread(target=run, name=f"crypto-refresh-{source}", daemon=True).start()
+    
+    def _source_rates(self, source: str, currencies: List[str], refresh: bool = False) -> Dict:
+        """
+        Rates de una fuente desde el cache, con edad de cada uno
+        Sin entrada (o demasiado vieja) → se consulta en línea; pasada del TTL → se refresca en background
+        refresh=True consulta en línea todo lo que pasó el TTL
+        """
+        now = time.monotonic()
+        ttl = SOURCE_TTL[source]
+        
+        with self._lock:
+            missing, stale = [], []
+            for currency in currencies:
+                cached = self._cache.get((source, currency))
+                age = now - cached["fetched_at"] if cached else None
+                if age is None or age > STALE_MAX_AGE or (refresh and age > ttl):
+                    missing.append(currency)
+                elif age > ttl:
+                    stale.append(currency)
+            
+            failed_at = self._failed_at.get(source)
+            backing_off = failed_at is not None and now - failed_at < RETRY_AFTER
+        
+        if missing and not backing_off:
+            self._fetch_source(source, missing)
+        if stale:
+            self._refresh_in_background(source, stale)
+        
+        now = time.monotonic()
+        rates = {"USDT": {}, "USDC": {}}
+        with self._lock:
+            for currency in currencies:
+                cached = self._cache.get((source, currency))
+                if cached is None or now - cached["fetched_at"] > STALE_MAX_AGE:
+                    continue
+                for coin, entry in cached["rates"].items():
+                    rates.setdefault(coin, {})[currency] = {
+                        **entry,
+                        "fetched_at": cached["timestamp"],
+                        "age_seconds": round(now - cached["fetched_at"], 1)
+                    }
         
         return rates
     
-    def get_all_rates(self, currencies: Optional[List[str]] = None) -> Dict:
+    def get_all_rates(self, currencies: Optional[List[str]] = None, refresh: bool = False) -> Dict:
         """
         Obtiene rates de todas las fuentes con TRIPLE FALLBACK
         1. CoinGecko (primary)
         2. ExchangeRate-Host (fallback si CoinGecko falla)
         3. Binance (last resort)
+        Se sirven del cache por fuente/moneda (ver SOURCE_TTL); cada rate trae su age_seconds
+        refresh=True: no servir nada pasado de TTL (lo usa el refresh programado)
         """
         if currencies is None:
             currencies = list(self.currency_map.keys())
+        else:
+            # Solo monedas conocidas: un código cualquiera crecería el cache y le pegaría a las fuentes
+            currencies = list(dict.fromkeys(currencies))
+            unsupported = [c for c in currencies if c not in self.currency_map]
+            if unsupported:
+                raise ValueError(
+                    f"Unsupported currencies: {', '.join(unsupported)} "
+                    f"(supported: {', '.join(self.currency_map)})"
+                )
+        
+        # Las fuentes corren en paralelo bajo un deadline global
+        expires = time.monotonic() + RACE_DEADLINE
+        futures = {
+            # INTENTO 1: CoinGecko (principal)
+            "coingecko": self._pool.submit(self._source_rates, "coingecko", currencies, refresh)
+        }
         
-        print(f"🔍 Fetching crypto rates for: {', '.join(currencies)}")
+        # Hedge: no esperar a CoinGecko más que su p95
+        wait([futures["coingecko"]], timeout=min(self._hedge_delay(), RACE_DEADLINE))
+        results = self._collect(futures)
         
-        # INTENTO 1: CoinGecko (principal)
-        coingecko_rates = self.get_coingecko_rates(currencies)
+        # INTENTO 2 y 3: ExchangeRate-Host y Binance, solo para las monedas que siguen faltando
+        missing = self._missing_currencies(currencies, results.get("coingecko", {}))
+        if missing:
+            futures["exchangerate-host"] = self._pool.submit(self._source_rates, "exchangerate-host", missing, refresh)
+            futures["binance"] = self._pool.submit(self._source_rates, "binance", missing, refresh)
         
-        # INTENTO 2: ExchangeRate-Host (fallback si CoinGecko falló o está incompleto)
-        exchangerate_rates = {}
-        if not coingecko_rates or self._is_incomplete(coingecko_rates, currencies):
-            print("⚠️  CoinGecko unavailable or incomplete, using ExchangeRate-Host fallback...")
-            exchangerate_rates = self.get_exchangerate_host_rates(currencies)
+        pending = [future for future in futures.values() if not future.done()]
+        while pending and time.monotonic() < expires:
+            _, pending = wait(pending, timeout=expires - time.monotonic(), return_when=FIRST_COMPLETED)
+            # Si lo completado ya cubre todo, no esperar a las demás
+            if not self._missing_currencies(currencies, *self._collect(futures).values()):
+                break
         
-        # INTENTO 3: Binance (last resort)
-        binance_rates = self.get_binance_rates(currencies)
+        results = self._collect(futures)
+        # Parcial solo si faltan monedas y alguna fuente que podría darlas no llegó a tiempo
+        timed_out = []
+        if self._missing_currencies(currencies, *results.values()):
+            timed_out = [source for source, future in futures.items() if not future.done()]
+        if timed_out:
+            print(f"⚠️ Crypto sources past deadline: {', '.join(timed_out)} (partial result)")
+        
+        coingecko_rates = results.get("coingecko", {})
+        exchangerate_rates = results.get("exchangerate-host", {})
+        binance_rates = results.get("binance", {})
         
         # Combinar resultados con prioridad: CoinGecko > ExchangeRate-Host > Binance
         combined_rates = {
             "timestamp": datetime.now().isoformat(),
             "source": "multi",
+            "partial": bool(timed_out),
+            "timed_out": timed_out,
             "rates": {}
         }
         
@@ -227,23 +450,38 @@ class CryptoRatesScraper:
         
         return combined_rates
     
-    def _is_incomplete(self, rates: Dict, currencies: List[str]) -> bool:
+    def _hedge_delay(self) -> float:
+        """p95 de la latencia de CoinGecko (o el default con pocas muestras)"""
+        with self._lock:
+            latencies = sorted(self._latencies["coingecko"])
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return latencies[int(0.95 * (len(latencies) - 1))]
+    
+    @staticmethod
+    def _collect(futures: Dict) -> Dict[str, Dict]:
+        """Resultados de las fuentes que ya terminaron (una que falló cuenta como vacía)"""
+        results = {}
+        for source, future in futures.items():
+            if future.done():
+                try:
+                    results[source] = future.result()
+                except Exception as e:
+                    print(f"Error in {source} crypto rates: {e}")
+                    results[source] = {}
+        return results
+    
+    def _missing_currencies(self, currencies: List[str], *sources: Dict) -> List[str]:
         """
-        Verifica si los rates están incompletos (faltan monedas)
+        Monedas a las que les falta el rate de algún coin en todas las fuentes dadas
         """
-        if not rates:
-            return True
-        
-        for coin in ["USDT", "USDC"]:
-            if coin not in rates:
-                return True
-            
-            coin_rates = rates[coin]
-            for currency in currencies:
-                if currency not in coin_rates or coin_rates[currency].get("rate") is None:
-                    return True
-        
-        return False
+        return [
+            currency for currency in currencies
+            if any(
+                not any(source.get(coin, {}).get(currency, {}).get("rate") is not None for source in sources)
+                for coin in ["USDT", "USDC"]
+            )
+        ]
     
     def compare_with_traditional(self, country: str, traditional_rates: Dict, 
                                  crypto_rates: Dict, amount: float = 1000) -> Dict:
@@ -310,8 +548,12 @@ class CryptoRatesScraper:
         """
         Obtiene resumen de todas las tasas crypto disponibles
         """
-        rates = self.get_all_rates()
-        
+        return self.summarize_rates(self.get_all_rates())
+    
+    def summarize_rates(self, rates: Dict) -> Dict:
+        """
+        Resumen de cobertura a partir de un resultado de get_all_rates()
+        """
         summary = {
             "timestamp": rates["timestamp"],
             "stablecoins": ["USDT", "USDC"],
@@ -1,51 +1,142 @@
 """
 ExchangeRate-API Real Rates
 """
-import requests
+import ragfin1_http
+from ragfin1_cache import ThreadSingleFlight
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from datetime import datetime
+from typing import Dict, Optional
 
 load_dotenv()
 
+# La tasa mid-market no depende del monto ni del provider:
+# una llamada a /latest/{base} trae todas las tasas y se reutiliza durante RATES_TTL
+RATES_TTL = int(os.getenv('EXCHANGERATE_TTL', '3600'))
+# Tras un fallo, no reintentar /latest antes de esto (evita miles de timeouts en un populate)
+RETRY_AFTER = 30
+
 class ExchangeRateScraper:
+    # Compartido entre instancias: cada scraper de provider crea la suya
+    _tables: Dict[str, Dict] = {}
+    _failed_at: Dict[str, float] = {}
+    _refreshing: set = set()
+    # El lock solo protege el estado; el HTTP va afuera, coalescido por base
+    _lock = threading.Lock()
+    _flight = ThreadSingleFlight()
+    upstream_calls = 0
+
     def __init__(self):
         self.api_key = os.getenv('EXCHANGERATE_API_KEY')
-        self.base_url = f"https://v6.exchangerate-api.com/v6/{self.api_key}/pair"
+        self.latest_url = f"https://v6.exchangerate-api.com/v6/{self.api_key}/latest"
     
-    def get_rate(self, from_currency="USD", to_currency="MXN", amount=500.0):
-        """Get real exchange rate"""
-        try:
-            url = f"{self.base_url}/{from_currency}/{to_currency}/{amount}"
+    def get_rates(self, base: str = "USD") -> Optional[Dict]:
+        """
+        Tabla {'rates', 'fetched_at', 'timestamp'} para `base`, refrescada cada RATES_TTL
+        Si el refresh falla (o ya hay uno en vuelo) se sigue sirviendo la última tabla buena
+        """
+        cls = ExchangeRateScraper
+        table = cls._tables.get(base)
+        if table and time.monotonic() - table['fetched_at'] < RATES_TTL:
+            return table
+        
+        with cls._lock:
+            # Otro thread pudo refrescarla mientras esperábamos el lock
+            table = cls._tables.get(base)
+            if table and time.monotonic() - table['fetched_at'] < RATES_TTL:
+                return table
             
-            response = requests.get(url, timeout=10)
+            failed_at = cls._failed_at.get(base)
+            if failed_at and time.monotonic() - failed_at < RETRY_AFTER:
+                return table
+            
+            # Otro thread ya la está trayendo: servir la vieja sin esperar al upstream
+            if table and base in cls._refreshing:
+                return table
+        
+        # Sin tabla: los threads concurrentes esperan la misma llamada
+        fresh = cls._flight.do(base, lambda: self._update(base, only_if_stale=True))
+        if fresh:
+            return fresh
+        
+        if table:
+            print(f"⚠️ Using stale {base} rates from {table['timestamp']}")
+        return table
+    
+    def refresh(self, base: str = "USD") -> Optional[Dict]:
+        """Trae /latest/{base} sin mirar el TTL (refresh programado). None si falla"""
+        return self._update(base)
+    
+    def _update(self, base: str, only_if_stale: bool = False) -> Optional[Dict]:
+        """Consulta /latest/{base} fuera del lock y guarda el resultado (o el fallo) bajo el lock"""
+        cls = ExchangeRateScraper
+        with cls._lock:
+            table = cls._tables.get(base)
+            if only_if_stale and table and time.monotonic() - table['fetched_at'] < RATES_TTL:
+                return table
+            cls._refreshing.add(base)
+        
+        fresh = None
+        try:
+            fresh = self._fetch_latest(base)
+        finally:
+            with cls._lock:
+                cls._refreshing.discard(base)
+                if fresh:
+                    cls._tables[base] = fresh
+                    cls._failed_at.pop(base, None)
+                else:
+                    cls._failed_at[base] = time.monotonic()
+        return fresh
+    
+    def _fetch_latest(self, base: str) -> Optional[Dict]:
+        with ExchangeRateScraper._lock:
+            ExchangeRateScraper.upstream_calls += 1
+        try:
+            response = ragfin1_http.get(f"{self.latest_url}/{base}", timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 
                 if data['result'] == 'success':
-                    rate = data['conversion_rate']
-                    converted = data['conversion_result']
-                    
-                    print(f"✅ REAL Rate: {from_currency}/{to_currency} = {rate}")
-                    print(f"   ${amount} {from_currency} = {converted:.2f} {to_currency}")
-                    
+                    rates = data['conversion_rates']
+                    print(f"✅ REAL Rates: {base} → {len(rates)} currencies")
                     return {
-                        "success": True,
-                        "from": from_currency,
-                        "to": to_currency,
-                        "rate": rate,
-                        "amount": amount,
-                        "converted": converted,
-                        "timestamp": datetime.now().isoformat(),
-                        "source": "exchangerate-api (REAL)"
+                        "rates": rates,
+                        "fetched_at": time.monotonic(),
+                        "timestamp": datetime.now().isoformat()
                     }
             
-            return {"success": False, "error": f"Status {response.status_code}"}
-                
+            print(f"❌ Error: /latest/{base} status {response.status_code}")
+            return None
+        
         except Exception as e:
             print(f"❌ Error: {e}")
-            return {"success": False, "error": str(e)}
+            return None
+    
+    def get_rate(self, from_currency="USD", to_currency="MXN", amount=500.0):
+        """Get real exchange rate (desde la tabla memoizada, converted se calcula local)"""
+        table = self.get_rates(from_currency)
+        
+        if not table:
+            return {"success": False, "error": f"Rates for {from_currency} unavailable"}
+        
+        rate = table['rates'].get(to_currency)
+        if rate is None:
+            return {"success": False, "error": f"Unsupported currency {to_currency}"}
+        
+        return {
+            "success": True,
+            "from": from_currency,
+            "to": to_currency,
+            "rate": rate,
+            "amount": amount,
+            "converted": amount * rate,
+            "timestamp": table['timestamp'],
+            "source": "exchangerate-api (REAL)"
+        }
 
 
 if __name__ == "__main__":
@@ -53,11 +144,12 @@ if __name__ == "__main__":
     
     print("\n🔍 Testing Real Exchange Rates:\n")
     
-    # USD to MXN
-    result1 = scraper.get_rate("USD", "MXN", 500)
-    
-    # USD to COP
-    result2 = scraper.get_rate("USD", "COP", 500)
+    # Una sola llamada upstream para los tres pares
+    for to_currency in ["MXN", "COP", "VES"]:
+        result = scraper.get_rate("USD", to_currency, 500)
+        if result['success']:
+            print(f"   USD/{to_currency} = {result['rate']} → $500 = {result['converted']:.2f} {to_currency}")
+        else:
+            print(f"   ❌ USD/{to_currency}: {result['error']}")
     
-    # USD to VES
-    result3 = scraper.get_rate("USD", "VES", 500)
\ No newline at end of file
+    print(f"\n📡 Upstream calls: {ExchangeRateScraper.upstream_calls}")
\ No newline at end of file
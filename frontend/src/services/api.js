@@ -21,6 +21,35 @@ export const getCompetitiveInsight = async (destination) => {
   return response.data;
 };
 
+// RAG Competitive Insight (SSE streaming)
+// onEvent recibe cada evento: numerical_analysis, token, done, error
+export const streamCompetitiveInsight = (destination, onEvent) => {
+  const source = new EventSource(`${API_BASE_URL}/api/v1/rag/competitive-insight/${destination}/stream`);
+  ['numerical_analysis', 'token', 'done', 'error'].forEach((type) => {
+    source.addEventListener(type, (e) => {
+      if (e.data) onEvent(JSON.parse(e.data));
+      if (type === 'done' || type === 'error') source.close();
+    });
+  });
+  return source;
+};
+
+// Quote grid: todos los providers en un rango de montos (arrays paralelos a `amounts`)
+export const getQuoteGrid = async (destination, amounts = '100..10000', step = 50) => {
+  const response = await api.get(`/api/v1/quote-grid/${destination}`, {
+    params: { amounts, step }
+  });
+  return response.data;
+};
+
+// Mejor provider para un monto (con el segundo y el ahorro)
+export const getBestProvider = async (destination, amount) => {
+  const response = await api.get(`/api/v1/best/${destination}`, {
+    params: { amount }
+  });
+  return response.data;
+};
+
 // Binance P2P
 export const getBinanceP2P = async (destination, amount = 1000) => {
   const response = await api.get(`/api/v1/binance-p2p/${destination}`, {
@@ -1,18 +1,17 @@
 """
 Intermex REAL Scraper
 """
-import requests
+import ragfin1_http
 from typing import Dict
 from datetime import datetime
 
 class IntermexRealScraper:
     def __init__(self):
         self.api_url = "https://www.intermexonline.com/api/v1/quote"
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Content-Type': 'application/json'
-        })
+        }
     
     def get_estimate(self, origin: str = "US", destination: str = "MX", amount: float = 500.0) -> Dict:
         """Get real Intermex quote"""
@@ -31,7 +30,8 @@ class IntermexRealScraper:
             
             print(f"🔍 Scraping Intermex: ${amount} {origin} → {destination}")
             
-            response = self.session.post(self.api_url, json=payload, timeout=10)
+            # Cotización: POST de solo lectura, se puede reintentar
+            response = ragfin1_http.post(self.api_url, json=payload, headers=self.headers, timeout=10, idempotent=True)
             
             if response.status_code == 200:
                 data = response.json()
@@ -4,28 +4,159 @@ RAGFIN1 FastAPI Application v3.2.0
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime
+import asyncio
+import json
+import math
 import os
+import threading
 from dotenv import load_dotenv
-from typing import Optional, List
-from collections import defaultdict
-from ragfin1_rag import RAGEngine
-from crypto_rates_scraper import CryptoRatesScraper
-from functools import lru_cache
-from datetime import datetime, timedelta
-
-cache_data = {}
-CACHE_DURATION = 300
+from typing import Any, Callable, Dict, Optional, List
+from ragfin1_cache import SingleFlight, TTLCache, create_cache_backend
+from ragfin1_rebuild import RebuildManager
+from ragfin1_scheduler import RefreshScheduler
+
+# anthropic, numpy, requests y los scrapers se importan en el primer uso (ver get_* más abajo):
+# importar main tiene que ser barato (cold start, ver check_startup.py y startup_budget.json)
 
 load_dotenv()
 
+# RAGFIN1_DB_PATH: otra DB (check_startup.py usa una temporal para no tocar la real)
+DB_PATH = os.getenv("RAGFIN1_DB_PATH", "ragfin1_data.db")
+# RAGFIN1_SCHEDULER=0: sin refresh en background ni llamadas a upstreams (/ready queda en 503)
+SCHEDULER_ENABLED = os.getenv("RAGFIN1_SCHEDULER", "1") != "0"
+
+CACHE_DURATION = 300
+CACHE_STALE_DURATION = 600
+CACHE_MAX_ENTRIES = 2048
+ANSWER_CACHE_MAX_ENTRIES = 4096
+
+# Intervalos de refresh en segundos (se pueden pisar con RAGFIN1_REFRESH_<JOB>)
+REFRESH_RATES_INTERVAL = 900
+REFRESH_CRYPTO_INTERVAL = 60
+REFRESH_BINANCE_P2P_INTERVAL = 120
+REFRESH_AGGREGATES_INTERVAL = 300
+REFRESH_STATS_INTERVAL = 30
+# Monto con el que se precalculan las cotizaciones P2P
+P2P_REFERENCE_AMOUNT = 1000
+
 app = FastAPI(title="RAGFIN1 API", version="3.2.0")
 
-# Inicializar componentes
-crypto_scraper = CryptoRatesScraper()
-rag_engine = RAGEngine()
+# Backend de cache compartido entre workers (RAGFIN1_CACHE_BACKEND = memory | sqlite | redis)
+cache_backend = create_cache_backend(max_entries=CACHE_MAX_ENTRIES, db_path=DB_PATH)
+# Respuestas de Claude aparte, con su propio límite: el churn del cache de endpoints no las desaloja
+answer_backend = create_cache_backend(max_entries=ANSWER_CACHE_MAX_ENTRIES, db_path=DB_PATH, namespace="answer")
+
+# ==================== COMPONENTES (LAZY) ====================
+
+_components: Dict[str, Any] = {}
+_components_lock = threading.Lock()
+
+def _component(name: str, factory: Callable[[], Any]) -> Any:
+    """Singleton por nombre, construido en el primer uso"""
+    component = _components.get(name)
+    if component is None:
+        with _components_lock:
+            component = _components.get(name)
+            if component is None:
+                component = factory()
+                _components[name] = component
+    return component
+
+def _build_rag_engine():
+    from ragfin1_rag import RAGEngine
+    return RAGEngine(DB_PATH, cache_backend=cache_backend, answer_backend=answer_backend)
+
+def _build_crypto_scraper():
+    from crypto_rates_scraper import CryptoRatesScraper
+    return CryptoRatesScraper()
+
+def _build_binance_p2p():
+    from binance_p2p_scraper import BinanceP2PScraper
+    return BinanceP2PScraper()
+
+def get_rag_engine():
+    return _component("rag_engine", _build_rag_engine)
+
+def get_crypto_scraper():
+    return _component("crypto_scraper", _build_crypto_scraper)
+
+def get_binance_p2p():
+    return _component("binance_p2p", _build_binance_p2p)
+
+def get_pricing_engine():
+    from ragfin1_pricing import get_engine
+    return get_engine()
+
+def _swap_rebuilt_database() -> int:
+    """Después de publicar la DB nueva: readers reabren y el snapshot se recarga"""
+    rag_engine = get_rag_engine()
+    rag_engine.connections.reset()
+    snapshot = rag_engine.refresh_snapshot(force=True)
+    return len(snapshot)
+
+def _populate_rebuild(db_path: str, progress) -> Dict[str, Any]:
+    from populate_massive import populate_massive
+    return populate_massive(db_path=db_path, progress=progress, verbose=False)
+
+# Repoblado blue/green en background (/admin/force-repopulate)
+rebuild_manager = RebuildManager(DB_PATH, populate=_populate_rebuild, on_swap=_swap_rebuilt_database)
+
+# ==================== BACKGROUND REFRESH ====================
+
+def _refresh_rates() -> dict:
+    from exchangerate_scraper import ExchangeRateScraper
+    table = ExchangeRateScraper().refresh("USD")
+    if not table:
+        raise RuntimeError("ExchangeRate-API /latest/USD unavailable")
+    # Tasas nuevas → breakpoints de best_provider (si el snapshot todavía no cargó, se arman on demand)
+    snapshot = get_rag_engine().snapshot
+    indexes = get_pricing_engine().warm(snapshot.destinations) if snapshot is not None else 0
+    return {"timestamp": table["timestamp"], "currencies": len(table["rates"]), "best_indexes": indexes}
+
+def _refresh_crypto() -> dict:
+    # Mantiene caliente el cache del scraper: los handlers leen de ahí
+    crypto_scraper = get_crypto_scraper()
+    rates = crypto_scraper.get_all_rates(refresh=True)
+    return crypto_scraper.summarize_rates(rates)
+
+def _refresh_binance_p2p() -> dict:
+    return get_binance_p2p().get_sell_rates(P2P_REFERENCE_AMOUNT)
+
+def _refresh_aggregates() -> dict:
+    # Snapshot columnar (solo se reconstruye si la DB cambió). Solo lee la DB local
+    # Primer run: acá se construye el RAGEngine (fuera del startup)
+    snapshot = get_rag_engine().refresh_snapshot()
+    return {"records": len(snapshot), "max_id": snapshot.max_id}
+
+def _flush_stats() -> dict:
+    # Contadores de queries/tokens de este worker → backend compartido (fuera del event loop)
+    rag_engine = _components.get("rag_engine")
+    if rag_engine is None:
+        return {"flushed": False}
+    rag_engine.flush_stats()
+    return {"flushed": True}
+
+refresh_scheduler = RefreshScheduler()
+refresh_scheduler.add("rates", _refresh_rates, REFRESH_RATES_INTERVAL)
+refresh_scheduler.add("crypto", _refresh_crypto, REFRESH_CRYPTO_INTERVAL)
+refresh_scheduler.add("binance_p2p", _refresh_binance_p2p, REFRESH_BINANCE_P2P_INTERVAL)
+# Sin snapshot la API funciona (cae a SQL) pero lenta: es lo único que bloquea /ready
+refresh_scheduler.add("aggregates", _refresh_aggregates, REFRESH_AGGREGATES_INTERVAL, required=True)
+refresh_scheduler.add("stats", _flush_stats, REFRESH_STATS_INTERVAL)
+
+# Coalescing: requests concurrentes con la misma key comparten un solo cálculo
+single_flight = SingleFlight()
+
+# Cache de respuestas acotado (LRU + TTL + stale-while-revalidate)
+response_cache = TTLCache(
+    ttl=CACHE_DURATION,
+    stale_ttl=CACHE_STALE_DURATION,
+    flight=single_flight,
+    backend=cache_backend
+)
 
 # CORS
 app.add_middleware(
@@ -59,99 +190,182 @@ class CompareRequest(BaseModel):
     destination: str
     providers: List[str]
 
+# ==================== SSE ====================
+
+async def _sse(events):
+    """Convierte eventos del RAG engine en frames Server-Sent Events"""
+    async for event in events:
+        yield f"event: {event['type']}\ndata: {json.dumps(event, default=float)}\n\n"
+
+def _sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        _sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ==================== ENDPOINTS BÁSICOS ====================
 
 @app.get("/health")
 async def health():
+    """Liveness: el proceso responde"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 cuando los componentes required están calientes, 503 mientras no"""
+    readiness = refresh_scheduler.readiness()
+    readiness["timestamp"] = datetime.now().isoformat()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
 # ==================== RAG ENDPOINTS ====================
 
 @app.post("/api/v1/rag/query")
 async def rag_query(request: QueryRequest):
     try:
-        result = rag_engine.query(
+        flight_key = "query:" + json.dumps([
+            " ".join(request.query.lower().split()),
+            request.destination,
+            request.provider,
+            request.max_tokens
+        ])
+        result = await single_flight.do(flight_key, lambda: get_rag_engine().aquery(
             user_query=request.query,
             destination=request.destination,
             provider=request.provider,
             max_tokens=request.max_tokens
-        )
+        ))
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/rag/query/stream")
+async def rag_query_stream(request: QueryRequest):
+    return _sse_response(get_rag_engine().astream_query(
+        user_query=request.query,
+        destination=request.destination,
+        provider=request.provider,
+        max_tokens=request.max_tokens
+    ))
+
 @app.get("/api/v1/rag/competitive-insight/{destination}")
 async def competitive_insight(destination: str):
     try:
-        # Check cache
-        cache_key = f"insight_{destination}"
-        if cache_key in cache_data:
-            cached_time, cached_result = cache_data[cache_key]
-            if datetime.now() - cached_time < timedelta(seconds=CACHE_DURATION):
-                return cached_result
-
-        # Fetch fresh data
-        result = rag_engine.competitive_insight(destination)
-
-        # Store in cache
-        cache_data[cache_key] = (datetime.now(), result)
-
-        return result
+        destination = destination.strip().upper()
+        return await response_cache.get_or_compute(
+            "insight", destination,
+            lambda: get_rag_engine().acompetitive_insight(destination)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/rag/competitive-insight/{destination}/stream")
+async def competitive_insight_stream(destination: str):
+    return _sse_response(get_rag_engine().astream_competitive_insight(destination))
+
 @app.post("/api/v1/rag/compare")
 async def compare_providers(request: CompareRequest):
     try:
-        result = rag_engine.compare_providers(
+        flight_key = f"compare:{request.destination}:{','.join(sorted(request.providers))}"
+        result = await single_flight.do(flight_key, lambda: get_rag_engine().acompare_providers(
             destination=request.destination,
             providers=request.providers
-        )
+        ))
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/rag/stats")
 async def rag_stats():
-    return rag_engine.get_stats()
+    import ragfin1_http
+
+    # Contadores y tamaño del cache salen del backend (SQLite/Redis): I/O fuera del event loop
+    engine_stats, cache_stats = await asyncio.gather(
+        asyncio.to_thread(get_rag_engine().get_stats),
+        asyncio.to_thread(response_cache.get_stats)
+    )
+    return {
+        **engine_stats,
+        "single_flight": single_flight.get_stats(),
+        "response_cache": cache_stats,
+        "upstream_http": ragfin1_http.get_metrics()
+    }
 
 @app.get("/api/v1/competitive-analysis/{destination}")
 async def competitive_analysis(destination: str):
     try:
-        # Check cache
-        cache_key = f"competitive_{destination}"
-        if cache_key in cache_data:
-            cached_time, cached_result = cache_data[cache_key]
-            if datetime.now() - cached_time < timedelta(seconds=CACHE_DURATION):
-                return cached_result
+        destination = destination.strip().upper()
+        return await response_cache.get_or_compute(
+            "competitive", destination,
+            lambda: asyncio.to_thread(get_rag_engine().get_competitive_analysis, destination)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/quote-grid/{destination}")
+async def quote_grid(destination: str, amounts: str = "100..10000", step: Optional[float] = None):
+    """
+    Fee / recipient_receives / effective_rate / rank de cada provider en cada monto
+    Arrays paralelos a `amounts`, calculados en una pasada vectorizada
+    """
+    if step is not None and not math.isfinite(step):
+        raise HTTPException(status_code=400, detail="step must be a finite number")
+
+    try:
+        destination = destination.strip().upper()
+        grid = await asyncio.to_thread(get_pricing_engine().quote_grid, destination, amounts, step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Fetch fresh data
-        result = rag_engine.get_competitive_analysis(destination)
+    if not grid["providers"]:
+        raise HTTPException(status_code=404, detail=f"No pricing available for {destination}")
+    return grid
 
-        # Store in cache
-        cache_data[cache_key] = (datetime.now(), result)
+@app.get("/api/v1/best/{destination}")
+async def best_provider(destination: str, amount: float):
+    """Provider más conveniente para `amount` USD, el segundo y la diferencia entre ambos"""
+    # inf/nan llegan como float válido desde el query string
+    if not math.isfinite(amount) or amount <= 0:
+        raise HTTPException(status_code=400, detail="amount must be a positive finite number")
 
-        return result
+    try:
+        destination = destination.strip().upper()
+        result = await asyncio.to_thread(get_pricing_engine().best_provider, destination, amount)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No pricing available for {destination}")
+    return result
+
 @app.get("/api/v1/crypto-rates")
 async def get_crypto_rates(currencies: Optional[str] = None):
     try:
         currency_list = None
         if currencies:
-            currency_list = [c.strip().upper() for c in currencies.split(",")]
+            currency_list = [c.strip().upper() for c in currencies.split(",") if c.strip()]
 
-        rates = crypto_scraper.get_all_rates(currency_list)
+        flight_key = "crypto_rates:" + (",".join(sorted(currency_list)) if currency_list else "all")
+        rates = await single_flight.do(
+            flight_key,
+            lambda: asyncio.to_thread(get_crypto_scraper().get_all_rates, currency_list)
+        )
 
         return {"success": True, "data": rates}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/crypto-summary")
 async def get_crypto_summary():
     try:
-        summary = crypto_scraper.get_crypto_summary()
+        summary = await single_flight.do(
+            "crypto_summary",
+            lambda: asyncio.to_thread(get_crypto_scraper().get_crypto_summary)
+        )
         return {"success": True, "data": summary}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -159,30 +373,22 @@ async def get_crypto_summary():
 @app.get("/api/v1/compare-traditional-vs-crypto/{destination}")
 async def compare_traditional_vs_crypto(destination: str, amount: float = 1000):
     try:
-        traditional_records = rag_engine.filter_data(
-            destination=destination.upper(),
-            limit=50
+        provider_stats = await asyncio.to_thread(
+            get_rag_engine().get_provider_stats, destination.upper(), 50
         )
 
-        if not traditional_records:
+        if not provider_stats:
             raise HTTPException(
                 status_code=404,
                 detail=f"No traditional rates found for {destination}"
             )
 
-        by_provider = defaultdict(list)
-        for rec in traditional_records:
-            by_provider[rec.provider].append(rec)
-
         traditional_rates = {}
-        for provider, recs in by_provider.items():
-            avg_rate = sum(r.exchange_rate for r in recs) / len(recs)
-            avg_fee = sum(r.fee for r in recs) / len(recs)
-
+        for provider, stats in provider_stats.items():
             traditional_rates[provider] = {
-                "rate": avg_rate,
-                "fee": avg_fee,
-                "total_cost": avg_rate + avg_fee
+                "rate": stats["avg_rate"],
+                "fee": stats["avg_fee"],
+                "total_cost": stats["avg_rate"] + stats["avg_fee"]
             }
 
         currency_map = {
@@ -194,9 +400,14 @@ async def compare_traditional_vs_crypto(destination: str, amount: float = 1000):
         }
 
         currency = currency_map.get(destination, destination)
-        crypto_rates = crypto_scraper.get_all_rates([currency])
+        if currency not in get_crypto_scraper().currency_map:
+            raise HTTPException(status_code=404, detail=f"No crypto rates for {currency}")
+        crypto_rates = await single_flight.do(
+            f"crypto_rates:{currency}",
+            lambda: asyncio.to_thread(get_crypto_scraper().get_all_rates, [currency])
+        )
 
-        comparison = crypto_scraper.compare_with_traditional(
+        comparison = get_crypto_scraper().compare_with_traditional(
             currency,
             traditional_rates,
             crypto_rates,
@@ -218,11 +429,17 @@ async def compare_traditional_vs_crypto(destination: str, amount: float = 1000):
 @app.get("/api/v1/binance-p2p/{destination}")
 async def get_binance_p2p_rate(destination: str, amount: float = 1000):
     """Obtiene tasa P2P de Binance para un país"""
-    from binance_p2p_scraper import BinanceP2PScraper
-
     try:
-        scraper = BinanceP2PScraper()
-        result = scraper.compare_with_traditional(destination.upper(), amount)
+        country = destination.upper()
+        # El aviso precalculado sirve si acepta este monto; si no, se consulta en vivo
+        sell_rate = refresh_scheduler.get("binance_p2p", {}).get(country)
+        if sell_rate and not sell_rate["min_amount"] <= amount <= sell_rate["max_amount"]:
+            sell_rate = None
+
+        if sell_rate is None:
+            result = await asyncio.to_thread(get_binance_p2p().compare_with_traditional, country, amount)
+        else:
+            result = get_binance_p2p().compare_with_traditional(country, amount, sell_rate=sell_rate)
 
         return {
             "success": True,
@@ -232,7 +449,6 @@ async def get_binance_p2p_rate(destination: str, amount: float = 1000):
         raise HTTPException(status_code=500, detail=str(e))
 
 # ==================== CARD PREMIUMS ENDPOINT ====================
-from card_scrapers import get_all_card_premiums
 
 @app.get("/api/v1/card-premiums/{country}")
 async def get_card_premiums(country: str, amount: int = 500):
@@ -240,6 +456,8 @@ async def get_card_premiums(country: str, amount: int = 500):
     Get card payment premiums for all LATAM countries
     Shows cost comparison: Bank Transfer vs Debit Card vs Credit Card
     """
+    from card_scrapers import get_all_card_premiums
+
     try:
         country_upper = country.upper()
         data = get_all_card_premiums(country_upper, amount)
@@ -250,34 +468,26 @@ async def get_card_premiums(country: str, amount: int = 500):
 # ==================== ADMIN ENDPOINT ====================
 @app.get("/admin/force-repopulate")
 async def force_repopulate():
-    """Emergency endpoint to repopulate database with fresh data"""
-    try:
-        import subprocess
-        if os.path.exists("ragfin1_data.db"):
-            os.remove("ragfin1_data.db")
-        
-        # Run populate script
-        result = subprocess.run(
-            ["python", "populate_massive.py"],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode == 0:
-            # Reload RAG engine data
-            rag_engine.load_all_data()
-            return {
-                "status": "success",
-                "message": "Database repopulated successfully",
-                "records": len(rag_engine.load_all_data())
-            }
-        else:
-            return {
-                "status": "error",
-                "message": f"Populate script failed: {result.stderr}"
-            }
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+    """
+    Repuebla la DB en segundo plano (blue/green): se construye en un archivo temporal,
+    se valida y se publica de forma atómica. La API sigue sirviendo la DB vieja mientras tanto
+    """
+    started = rebuild_manager.start()
+    return {
+        "status": "started" if started else "already_running",
+        "message": "Rebuild running in background" if started else "A rebuild is already in progress",
+        "rebuild": rebuild_manager.status()
+    }
+
+@app.get("/admin/scheduler")
+async def scheduler_status():
+    """Última corrida, duración y próxima corrida de cada refresh en background"""
+    return refresh_scheduler.status()
+
+@app.get("/admin/force-repopulate/status")
+async def force_repopulate_status():
+    """Estado y progreso de la última reconstrucción"""
+    return rebuild_manager.status()
 
 # ==================== STATIC FILES & FRONTEND ====================
 
@@ -310,21 +520,17 @@ else:
 @app.on_event("startup")
 async def startup_event():
     print("🚀 RAGFIN1 API v3.2.0 Starting...")
-    print("✅ RAG Engine initialized")
-
-    records = rag_engine.load_all_data()
-    print(f"✅ {len(records)} exchange records loaded")
-
-    print("✅ Crypto rates scraper initialized")
+    if not os.getenv("ANTHROPIC_API_KEY"):
+        print("⚠️  ANTHROPIC_API_KEY not set - data endpoints work, Claude queries will fail")
+
+    # Snapshot, tasas, crypto e índices se calientan en background (primer run de cada job):
+    # el startup no espera a la red. /ready dice cuándo están listos
+    if SCHEDULER_ENABLED:
+        refresh_scheduler.start()
+        print(f"✅ Background warmup started ({', '.join(refresh_scheduler.jobs)}) - see /ready")
+    else:
+        print("⚠️  Background refresh disabled (RAGFIN1_SCHEDULER=0)")
 
-    try:
-        summary = crypto_scraper.get_crypto_summary()
-        usdt_cov = summary['rates_by_coin']['USDT']['coverage_pct']
-        usdc_cov = summary['rates_by_coin']['USDC']['coverage_pct']
-        print(f"✅ Crypto coverage: USDT {usdt_cov}%, USDC {usdc_cov}%")
-    except Exception as e:
-        print(f"⚠️ Crypto scraper warning: {e}")
-    
     print("✅ Card premiums available for 18 countries")
     
     # Check if frontend is available
@@ -332,8 +538,18 @@ async def startup_event():
         print(f"✅ Frontend build found and mounted")
     else:
         print(f"⚠️  Frontend build not found - API only mode")
-    
-    
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    refresh_scheduler.stop()
+    rag_engine = _components.get("rag_engine")
+    if rag_engine is not None:
+        try:
+            await asyncio.to_thread(rag_engine.flush_stats)
+        except Exception as e:
+            print(f"⚠️ Could not flush RAG stats: {e}")
+    print("👋 Background refresh scheduler stopped")
+
 
 # ==================== MAIN ====================
 
@@ -1,8 +1,5 @@
 from ragfin1_db import RAGFIN1Database
-from wu_scraper_DO import WesternUnionScraperDO
-from wise_scraper_DO import WiseScraperDO
-from intermex_scraper_DO import IntermexScraperDO
-from remitly_scraper_DO import RemitlyScraperDO
+from ragfin1_pricing import ProviderQuoter
 import time
 
 def populate_dominican_republic():
@@ -13,10 +10,10 @@ def populate_dominican_republic():
     print("=" * 50)
     
     # Initialize scrapers
-    wu = WesternUnionScraperDO()
-    wise = WiseScraperDO()
-    intermex = IntermexScraperDO()
-    remitly = RemitlyScraperDO()
+    wu = ProviderQuoter("Western Union", "DO")
+    wise = ProviderQuoter("Wise", "DO")
+    intermex = ProviderQuoter("Intermex", "DO")
+    remitly = ProviderQuoter("Remitly", "DO")
     
     # Initialize database
     db = RAGFIN1Database("ragfin1.db")
@@ -40,7 +37,7 @@ def populate_dominican_republic():
         ("Remitly", remitly)
     ]
     
-    total_inserted = 0
+    pending = []
     
     for corridor in corridors:
         origin = corridor["origin"]
@@ -55,9 +52,8 @@ def populate_dominican_republic():
                 data = scraper.get_estimate(origin, destination, amount)
                 
                 if data:
-                    db.insert_corridor_data(data)
-                    print(f"✓ Inserted (Fee: ${data['fee']}, Rate: {data['exchange_rate']:.2f})")
-                    total_inserted += 1
+                    pending.append(data)
+                    print(f"✓ Scraped (Fee: ${data['fee']}, Rate: {data['exchange_rate']:.2f})")
                 else:
                     print(f"✗ Failed")
                     
@@ -66,6 +62,9 @@ def populate_dominican_republic():
             except Exception as e:
                 print(f"✗ Error: {str(e)}")
     
+    result = db.insert_many(pending)
+    total_inserted = result['inserted']
+    
     print("\n" + "=" * 50)
     print(f"DOMINICAN REPUBLIC DATA POPULATION COMPLETE")
     print(f"Total records inserted: {total_inserted}")
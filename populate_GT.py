@@ -1,21 +1,18 @@
 """
 Populate RAGFIN1 with Guatemala (GT) data
 """
-from wu_scraper_GT import WesternUnionScraperGT
-from wise_scraper_GT import WiseScraperGT
-from intermex_scraper_GT import IntermexScraperGT
-from remitly_scraper_GT import RemitlyScraperGT
 from ragfin1_db import RAGFIN1Database
+from ragfin1_pricing import ProviderQuoter
 import json
 
 def populate_guatemala():
     print("🚀 Populating RAGFIN1 Database - GUATEMALA (GT)")
     print("=" * 60)
     
-    wu = WesternUnionScraperGT()
-    wise = WiseScraperGT()
-    intermex = IntermexScraperGT()
-    remitly = RemitlyScraperGT()
+    wu = ProviderQuoter("Western Union", "GT")
+    wise = ProviderQuoter("Wise", "GT")
+    intermex = ProviderQuoter("Intermex", "GT")
+    remitly = ProviderQuoter("Remitly", "GT")
     
     db = RAGFIN1Database("ragfin1.db")
     
@@ -58,19 +55,18 @@ def populate_guatemala():
     print("=" * 60)
     print("💾 Inserting Guatemala data into database...")
     
-    inserted = 0
-    for result in all_results:
-        if result.get('success'):
-            row_id = db.insert_corridor_data(result)
-            inserted += 1
-            p = result['provider']
-            o = result['origin']
-            d = result['destination']
-            a = result['send_amount']
-            print(f"✅ {p:15} {o} → {d} (${a:6.0f}) - Row {row_id}")
+    rows = [result for result in all_results if result.get('success')]
+    inserted = db.insert_many(rows)
+    
+    for result, row_id in zip(rows, inserted['ids']):
+        p = result['provider']
+        o = result['origin']
+        d = result['destination']
+        a = result['send_amount']
+        print(f"✅ {p:15} {o} → {d} (${a:6.0f}) - Row {row_id}")
     
     print("=" * 60)
-    print(f"✅ Successfully inserted {inserted} Guatemala records")
+    print(f"✅ Successfully inserted {inserted['inserted']} Guatemala records")
     
     stats = db.get_stats()
     print(f"📊 Total records in database: {stats['total_records']}")
@@ -1,8 +1,5 @@
 from ragfin1_db import RAGFIN1Database
-from wu_scraper_SV import WesternUnionScraperSV
-from wise_scraper_SV import WiseScraperSV
-from intermex_scraper_SV import IntermexScraperSV
-from remitly_scraper_SV import RemitlyScraperSV
+from ragfin1_pricing import ProviderQuoter
 import time
 
 def populate_el_salvador():
@@ -13,10 +10,10 @@ def populate_el_salvador():
     print("=" * 50)
     
     # Initialize scrapers
-    wu = WesternUnionScraperSV()
-    wise = WiseScraperSV()
-    intermex = IntermexScraperSV()
-    remitly = RemitlyScraperSV()
+    wu = ProviderQuoter("Western Union", "SV")
+    wise = ProviderQuoter("Wise", "SV")
+    intermex = ProviderQuoter("Intermex", "SV")
+    remitly = ProviderQuoter("Remitly", "SV")
     
     # Initialize database
     db = RAGFIN1Database("ragfin1.db")
@@ -40,7 +37,7 @@ def populate_el_salvador():
         ("Remitly", remitly)
     ]
     
-    total_inserted = 0
+    pending = []
     
     for corridor in corridors:
         origin = corridor["origin"]
@@ -55,9 +52,8 @@ def populate_el_salvador():
                 data = scraper.get_estimate(origin, destination, amount)
                 
                 if data:
-                    db.insert_corridor_data(data)
-                    print(f"✓ Inserted (Fee: ${data['fee']})")
-                    total_inserted += 1
+                    pending.append(data)
+                    print(f"✓ Scraped (Fee: ${data['fee']})")
                 else:
                     print(f"✗ Failed")
                     
@@ -66,6 +62,9 @@ def populate_el_salvador():
             except Exception as e:
                 print(f"✗ Error: {str(e)}")
     
+    result = db.insert_many(pending)
+    total_inserted = result['inserted']
+    
     print("\n" + "=" * 50)
     print(f"EL SALVADOR DATA POPULATION COMPLETE")
     print(f"Total records inserted: {total_inserted}")
@@ -57,15 +57,14 @@ def populate_database():
     print("=" * 60)
     print("💾 Inserting into database...")
     
-    inserted = 0
-    for result in all_results:
-        if result.get('success'):
-            row_id = db.insert_corridor_data(result)
-            inserted += 1
-            print(f"✅ Row {row_id}")
+    rows = [result for result in all_results if result.get('success')]
+    inserted = db.insert_many(rows)
+    
+    for row_id in inserted['ids']:
+        print(f"✅ Row {row_id}")
     
     print("=" * 60)
-    print(f"✅ Successfully inserted {inserted} records")
+    print(f"✅ Successfully inserted {inserted['inserted']} records")
     
     stats = db.get_stats()
     print(f"📊 Total records: {stats['total_records']}")
@@ -1,43 +1,17 @@
 """
 Populate RAGFIN1 with REAL data
 """
-from wise_scraper_real import WiseScraperReal
-from wu_scraper_real_v2 import WesternUnionScraperReal
-from intermex_scraper_real_v2 import IntermexScraperReal
-from remitly_scraper_MX import RemitlyScraperMX
-from remitly_scraper_CO import RemitlyScraperCO
-from remitly_scraper_BR import RemitlyScraperBR
-from remitly_scraper_AR import RemitlyScraperAR
-from remitly_scraper_VE import RemitlyScraperVE
-from remitly_scraper_CL import RemitlyScraperCL
-from remitly_scraper_PE import RemitlyScraperPE
-from remitly_scraper_BO import RemitlyScraperBO
-from remitly_scraper_GT import RemitlyScraperGT
-from remitly_scraper_DO import RemitlyScraperDO
-from remitly_scraper_SV import RemitlyScraperSV
 from ragfin1_db import RAGFIN1Database
+from ragfin1_pricing import ProviderQuoter
 import json
 
 def populate_database():
     print("🚀 Populating RAGFIN1 Database - REAL DATA")
     print("=" * 60)
     
-    wise = WiseScraperReal()
-    wu = WesternUnionScraperReal()
-    intermex = IntermexScraperReal()
-    
-    # Initialize Remitly scrapers
-    remitly_mx = RemitlyScraperMX()
-    remitly_co = RemitlyScraperCO()
-    remitly_br = RemitlyScraperBR()
-    remitly_ar = RemitlyScraperAR()
-    remitly_ve = RemitlyScraperVE()
-    remitly_cl = RemitlyScraperCL()
-    remitly_pe = RemitlyScraperPE()
-    remitly_bo = RemitlyScraperBO()
-    remitly_gt = RemitlyScraperGT()
-    remitly_do = RemitlyScraperDO()
-    remitly_sv = RemitlyScraperSV()
+    wise = ProviderQuoter("Wise")
+    wu = ProviderQuoter("Western Union")
+    intermex = ProviderQuoter("Intermex")
     
     db = RAGFIN1Database("ragfin1_data.db")
     
@@ -78,17 +52,8 @@ def populate_database():
     print("✅ Remitly (REAL rates)...")
     remitly_results = []
     remitly_scrapers = {
-        'MX': remitly_mx,
-        'CO': remitly_co,
-        'BR': remitly_br,
-        'AR': remitly_ar,
-        'VE': remitly_ve,
-        'CL': remitly_cl,
-        'PE': remitly_pe,
-        'BO': remitly_bo,
-        'GT': remitly_gt,
-        'DO': remitly_do,
-        'SV': remitly_sv
+        country: ProviderQuoter("Remitly", country)
+        for country in ['MX', 'CO', 'BR', 'AR', 'VE', 'CL', 'PE', 'BO', 'GT', 'DO', 'SV']
     }
     
     for corridor in corridors:
@@ -109,19 +74,18 @@ def populate_database():
     print("=" * 60)
     print("💾 Inserting into database...")
     
-    inserted = 0
-    for result in all_results:
-        if result.get('success'):
-            row_id = db.insert_corridor_data(result)
-            inserted += 1
-            p = result.get('provider', 'Unknown')
-            o = result.get('origin', 'US')
-            d = result.get('destination', '??')
-            a = result.get('send_amount', 0)
-            print(f"✅ {p:15} {o} → {d} (${a:6.0f}) - Row {row_id}")
+    rows = [result for result in all_results if result.get('success')]
+    inserted = db.insert_many(rows)
+    
+    for result, row_id in zip(rows, inserted['ids']):
+        p = result.get('provider', 'Unknown')
+        o = result.get('origin', 'US')
+        d = result.get('destination', '??')
+        a = result.get('send_amount', 0)
+        print(f"✅ {p:15} {o} → {d} (${a:6.0f}) - Row {row_id}")
     
     print("=" * 60)
-    print(f"✅ Successfully inserted {inserted} records with REAL data")
+    print(f"✅ Successfully inserted {inserted['inserted']} records with REAL data")
     
     stats = db.get_stats()
     print(f"📊 Total records: {stats['total_records']}")
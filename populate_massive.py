@@ -1,70 +1,48 @@
 """
 Populate 100K records - ALL corridors, ALL amounts
 """
-from wise_scraper_real import WiseScraperReal
-from wu_scraper_real_v2 import WesternUnionScraperReal
-from intermex_scraper_real_v2 import IntermexScraperReal
+from typing import Any, Dict, Optional
+
 from ragfin1_db import RAGFIN1Database
-import time
+from ragfin1_ingest import IngestProgress, build_jobs, run_ingest
+from ragfin1_pricing import ProviderQuoter
 
-def populate_massive():
+def populate_massive(db_path: str = "ragfin1_data.db",
+                     progress: Optional[IngestProgress] = None,
+                     verbose: bool = True) -> Dict[str, Any]:
     print("🚀 Populating 100,000 records with REAL data")
     print("=" * 60)
-    
-    wise = WiseScraperReal()
-    wu = WesternUnionScraperReal()
-    intermex = IntermexScraperReal()
-    
-    db = RAGFIN1Database("ragfin1_data.db")
-    
+
+    scrapers = {
+        provider: ProviderQuoter(provider)
+        for provider in ["Wise", "Western Union", "Intermex"]
+    }
+
     # Countries
-    countries = ["MX", "CO", "VE", "PE", "BR", "CL", "AR", "GT", "HN", "SV", 
+    countries = ["MX", "CO", "VE", "PE", "BR", "CL", "AR", "GT", "HN", "SV",
                  "NI", "CR", "PA", "DO", "EC", "BO", "PY", "UY"]
-    
+
     # Amounts (100 to 10000 in steps)
     amounts = list(range(100, 1000, 50)) + list(range(1000, 5000, 100)) + list(range(5000, 10001, 500))
-    
-    print(f"📊 {len(countries)} countries × {len(amounts)} amounts × 3 providers")
-    print(f"   = {len(countries) * len(amounts) * 3} combinations")
+
+    jobs = build_jobs(scrapers.keys(), countries, amounts)
+
+    print(f"📊 {len(countries)} countries × {len(amounts)} amounts × {len(scrapers)} providers")
+    print(f"   = {len(jobs)} combinations")
     print()
-    
-    inserted = 0
-    
-    for country in countries:
-        print(f"\n🌎 Processing {country}...")
-        
-        for amount in amounts:
-            # Wise
-            result = wise.get_estimate("US", country, amount)
-            if result.get('success'):
-                db.insert_corridor_data(result)
-                inserted += 1
-            
-            # Western Union
-            result = wu.get_estimate("US", country, amount)
-            if result.get('success'):
-                db.insert_corridor_data(result)
-                inserted += 1
-            
-            # Intermex
-            result = intermex.get_estimate("US", country, amount)
-            if result.get('success'):
-                db.insert_corridor_data(result)
-                inserted += 1
-            
-            if inserted % 100 == 0:
-                print(f"   ✅ {inserted:,} records inserted...")
-            
-            # Rate limit protection
-            time.sleep(0.1)
-    
+
+    stats = run_ingest(jobs, scrapers, db_path=db_path, verbose=verbose, progress=progress)
+
     print("\n" + "=" * 60)
-    print(f"✅ Total inserted: {inserted:,} records")
-    
-    stats = db.get_stats()
-    print(f"📊 Database total: {stats['total_records']:,} records")
-    
+    print(f"✅ Total inserted: {stats['inserted']:,} records in {stats['elapsed_seconds']:.1f}s")
+    print(f"   {stats['jobs_per_sec']:.1f} jobs/s · {stats['errors']:,} errors ({stats['error_rate']:.1%})")
+
+    db = RAGFIN1Database(db_path)
+    db_stats = db.get_stats()
+    print(f"📊 Database total: {db_stats['total_records']:,} records")
+
     db.close()
+    return stats
 
 if __name__ == "__main__":
-    populate_massive()
\ No newline at end of file
+    populate_massive()
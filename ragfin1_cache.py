@@ -0,0 +1,588 @@
+"""
+RAGFIN1 Cache utilities
+- SingleFlight: requests concurrentes con la misma key comparten un solo cálculo
+  (ThreadSingleFlight: lo mismo para código sync con threads)
+- Backends de cache intercambiables: memoria, SQLite compartido, Redis (protocolo RESP)
+- TTLCache: cache acotado (LRU + TTL) con stale-while-revalidate sobre cualquier backend
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class SingleFlight:
+    """
+    Coalescing de requests en vuelo (asyncio)
+    El primer caller lanza el cálculo; los demás con la misma key esperan
+    el mismo resultado en vez de repetir la llamada a Claude / DB / APIs
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.followers += 1
+
+        # shield: si un cliente se desconecta, el cálculo sigue para los demás
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # Evitar "exception was never retrieved" si todos los callers se fueron
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "in_flight": len(self._inflight)
+        }
+
+
+class ThreadSingleFlight:
+    """
+    SingleFlight para código sync (threads)
+    El primer thread ejecuta fn; los demás con la misma key esperan y reciben
+    el mismo resultado (o la misma excepción)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                self.leaders += 1
+                call = {"done": threading.Event(), "result": None, "error": None}
+                self._inflight[key] = call
+            else:
+                self.followers += 1
+
+        if not leader:
+            call["done"].wait()
+        else:
+            try:
+                call["result"] = fn()
+            except BaseException as e:
+                call["error"] = e
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                call["done"].set()
+
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "in_flight": len(self._inflight)
+            }
+
+
+def _json_default(obj: Any) -> Any:
+    # numpy.float64 / numpy.int64 y similares
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+class CacheBackend:
+    """
+    Interfaz de backend de cache
+    Todos los valores se guardan con su timestamp: get() devuelve (stored_at, value)
+    set() devuelve las keys que tuvo que expulsar para respetar el límite
+    """
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> List[str]:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        raise NotImplementedError
+
+    def size(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Backend en proceso (un worker) - LRU acotado por max_entries"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (stored_at, expires_at, value)
+        self._data: "OrderedDict[str, Tuple[float, Optional[float], Any]]" = OrderedDict()
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            stored_at, expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return stored_at, value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> List[str]:
+        now = time.time()
+        evicted = []
+
+        with self._lock:
+            self._data[key] = (now, now + ttl if ttl is not None else None, value)
+            self._data.move_to_end(key)
+
+            # Primero lo expirado, después LRU hasta quedar dentro del límite
+            for k in [k for k, (_, exp, _) in self._data.items() if exp is not None and exp <= now]:
+                del self._data[k]
+                evicted.append(k)
+
+            while len(self._data) > self.max_entries:
+                k, _ = self._data.popitem(last=False)
+                evicted.append(k)
+
+        return evicted
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            self._counters[key] += amount
+            return self._counters[key]
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Backend en un archivo SQLite compartido
+    Todos los workers de la misma máquina ven las mismas entradas
+    Eviction LRU: cada hit actualiza last_access y se desalojan las menos usadas recientemente
+    table: cada tabla tiene su propio límite (p.ej. respuestas de Claude aparte de las de endpoints)
+    """
+
+    def __init__(self, path: str = "ragfin1_cache.db", max_entries: int = 2048, table: str = "cache_entries"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Archivos de cache anteriores al LRU: agregar la columna (arranca en stored_at)
+        columns = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        if "last_access" not in columns:
+            try:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+                self.conn.execute(f"UPDATE {table} SET last_access = stored_at")
+            except sqlite3.OperationalError:
+                # Otro worker migró primero
+                pass
+        if table == "cache_entries":
+            # Índices de versiones anteriores (FIFO por stored_at, LRU con nombre sin tabla)
+            self.conn.execute("DROP INDEX IF EXISTS idx_cache_stored")
+            self.conn.execute("DROP INDEX IF EXISTS idx_cache_last_access")
+        self.conn.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_last_access
+            ON {table}(last_access)
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_counters (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT value, stored_at, expires_at FROM {self.table} WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        value, stored_at, expires_at = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            return None
+
+        with self._lock, self.conn:
+            self.conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+
+        return stored_at, json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> List[str]:
+        now = time.time()
+        payload = json.dumps(value, default=_json_default)
+
+        with self._lock, self.conn:
+            self.conn.execute(f"""
+                INSERT OR REPLACE INTO {self.table} (key, value, stored_at, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+            """, (key, payload, now, now + ttl if ttl is not None else None, now))
+
+            evicted = [row[0] for row in self.conn.execute(
+                f"SELECT key FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (now,)
+            )]
+            overflow = self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - len(evicted) - self.max_entries
+            if overflow > 0:
+                evicted += [row[0] for row in self.conn.execute(f"""
+                    SELECT key FROM {self.table}
+                    WHERE expires_at IS NULL OR expires_at > ?
+                    ORDER BY last_access LIMIT ?
+                """, (now, overflow))]
+
+            self.conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(k,) for k in evicted])
+
+        return evicted
+
+    def delete(self, key: str):
+        with self._lock, self.conn:
+            self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock, self.conn:
+            return self.conn.execute("""
+                INSERT INTO cache_counters (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = value + excluded.value
+                RETURNING value
+            """, (key, amount)).fetchone()[0]
+
+    def size(self) -> int:
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+# Comandos que se pueden repetir sin cambiar el resultado
+IDEMPOTENT_COMMANDS = {"GET", "SET", "DEL", "EXPIRE", "SCAN"}
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend Redis (cualquier servidor que hable RESP)
+    Cliente mínimo sobre socket - sin dependencias extra
+    Compartido entre workers y entre máquinas; Redis se encarga de expirar
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "ragfin1:", timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._sock = None
+        self._reader = None
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.db:
+            self._send("SELECT", self.db)
+
+    def _close(self):
+        try:
+            if self._sock:
+                self._sock.close()
+        finally:
+            self._sock = None
+            self._reader = None
+
+    def _send(self, *args) -> Any:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RuntimeError(f"Redis error: {payload.decode()}")
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count == -1:
+                return None
+            return [self._read_reply() for _ in range(count)]
+
+        raise RuntimeError(f"Unexpected Redis reply: {line!r}")
+
+    def _command(self, *args) -> Any:
+        """
+        Un reintento si la conexión se cayó. Si el comando ya salió, solo se reintenta
+        si es idempotente: un INCRBY que llegó pero perdió la respuesta se aplicaría dos veces
+        """
+        retry_after_send = str(args[0]).upper() in IDEMPOTENT_COMMANDS
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt:
+                        raise
+                    continue
+
+                try:
+                    return self._send(*args)
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt or not retry_after_send:
+                        raise
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        raw = self._command("GET", self.prefix + key)
+        if raw is None:
+            return None
+
+        entry = json.loads(raw)
+        return entry["t"], entry["v"]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> List[str]:
+        payload = json.dumps({"t": time.time(), "v": value}, default=_json_default)
+        if ttl is not None:
+            self._command("SET", self.prefix + key, payload, "PX", max(1, int(ttl * 1000)))
+        else:
+            self._command("SET", self.prefix + key, payload)
+        return []
+
+    def delete(self, key: str):
+        self._command("DEL", self.prefix + key)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        return self._command("INCRBY", self.prefix + key, amount)
+
+    def size(self) -> int:
+        """Keys bajo el prefijo (SCAN, no DBSIZE: la DB de Redis puede ser compartida)"""
+        pattern = "".join("\\" + c if c in "*?[]\\" else c for c in self.prefix) + "*"
+        cursor, count = b"0", 0
+        while True:
+            cursor, keys = self._command("SCAN", cursor, "MATCH", pattern, "COUNT", 1000)
+            count += len(keys)
+            if cursor == b"0":
+                return count
+
+
+CACHE_FILENAME = "ragfin1_cache.db"
+
+
+def default_cache_path(db_path: str = "ragfin1_data.db") -> str:
+    """Cache SQLite al lado de la DB de datos (no en el cwd del proceso)"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), CACHE_FILENAME)
+
+
+def create_cache_backend(kind: Optional[str] = None,
+                         max_entries: int = 2048,
+                         path: Optional[str] = None,
+                         url: Optional[str] = None,
+                         db_path: str = "ragfin1_data.db",
+                         namespace: Optional[str] = None) -> CacheBackend:
+    """
+    Crea el backend según config
+    RAGFIN1_CACHE_BACKEND = memory | sqlite | redis (default: sqlite)
+    RAGFIN1_CACHE_PATH    = archivo SQLite (default: ragfin1_cache.db en el directorio de db_path)
+    RAGFIN1_REDIS_URL     = redis://host:port/db
+    namespace: entradas aparte con su propio límite (tabla {namespace}_entries en SQLite,
+    prefijo ragfin1:{namespace}: en Redis) - el churn de otro cache no las desaloja
+    """
+    kind = (kind or os.getenv("RAGFIN1_CACHE_BACKEND", "sqlite")).lower()
+
+    if kind == "memory":
+        return MemoryBackend(max_entries=max_entries)
+    if kind == "sqlite":
+        path = path or os.getenv("RAGFIN1_CACHE_PATH") or default_cache_path(db_path)
+        table = f"{namespace}_entries" if namespace else "cache_entries"
+        return SQLiteBackend(path, max_entries=max_entries, table=table)
+    if kind == "redis":
+        prefix = f"ragfin1:{namespace}:" if namespace else "ragfin1:"
+        return RedisBackend(url or os.getenv("RAGFIN1_REDIS_URL", "redis://localhost:6379/0"), prefix=prefix)
+
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+class TTLCache:
+    """
+    Cache de respuestas con TTL sobre un CacheBackend
+    - TTL: una entrada es fresca durante `ttl` segundos
+    - Stale-while-revalidate: hasta `ttl + stale_ttl` se sirve la versión vieja
+      y se refresca en background (una sola vez gracias a SingleFlight)
+    - El límite de tamaño lo aplica el backend (LRU en memoria y en SQLite, maxmemory en Redis)
+    Las keys se normalizan (espacios y mayúsculas) para que "mx" y "MX" compartan entrada
+    Los resultados fallidos ({"success": False} o con "error") no se guardan: el backend es
+    compartido entre workers y un fallo upstream se serviría a todos hasta que expire
+    """
+
+    def __init__(self,
+                 max_entries: int = 512,
+                 ttl: float = 300,
+                 stale_ttl: float = 600,
+                 flight: Optional[SingleFlight] = None,
+                 backend: Optional[CacheBackend] = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.flight = flight or SingleFlight()
+        self.backend = backend or MemoryBackend(max_entries=max_entries)
+        self._background = set()
+
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "failures_not_cached": 0}
+        )
+
+    @staticmethod
+    def is_failure(result: Any) -> bool:
+        return isinstance(result, dict) and (result.get("success") is False or "error" in result)
+
+    @staticmethod
+    def normalize_key(key: Any) -> str:
+        return " ".join(str(key).split()).upper()
+
+    def _backend_key(self, namespace: str, key: Any) -> str:
+        return f"{namespace}:{self.normalize_key(key)}"
+
+    def get(self, namespace: str, key: Any) -> Tuple[Optional[Any], bool]:
+        """
+        Devuelve (value, fresh)
+        value es None si no hay entrada o ya pasó la ventana stale
+        """
+        entry = self.backend.get(self._backend_key(namespace, key))
+
+        if entry is None:
+            self._stats[namespace]["misses"] += 1
+            return None, False
+
+        stored_at, value = entry
+        age = time.time() - stored_at
+
+        if age < self.ttl:
+            self._stats[namespace]["hits"] += 1
+            return value, True
+
+        self._stats[namespace]["stale_hits"] += 1
+        return value, False
+
+    def set(self, namespace: str, key: Any, value: Any):
+        evicted = self.backend.set(
+            self._backend_key(namespace, key), value, ttl=self.ttl + self.stale_ttl
+        )
+        for backend_key in evicted:
+            self._stats[backend_key.split(":", 1)[0]]["evictions"] += 1
+
+    async def get_or_compute(self, namespace: str, key: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Fresca → se devuelve directo
+        Stale → se devuelve la vieja y se refresca en background
+        Miss → se calcula (coalescido) y se guarda
+        """
+        value, fresh = await asyncio.to_thread(self.get, namespace, key)
+        flight_key = self._backend_key(namespace, key)
+
+        async def compute():
+            result = await fn()
+            if self.is_failure(result):
+                # Stale: se sigue sirviendo la versión buena anterior
+                self._stats[namespace]["failures_not_cached"] += 1
+            else:
+                await asyncio.to_thread(self.set, namespace, key, result)
+            return result
+
+        if value is None:
+            return await self.flight.do(flight_key, compute)
+
+        if not fresh:
+            task = asyncio.ensure_future(self._revalidate(flight_key, compute))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+        return value
+
+    async def _revalidate(self, flight_key: str, compute: Callable[[], Awaitable[Any]]):
+        try:
+            await self.flight.do(flight_key, compute)
+        except Exception as e:
+            # Se sigue sirviendo la versión stale hasta que expire
+            print(f"⚠️ Cache refresh failed for {flight_key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "namespaces": {ns: dict(counters) for ns, counters in self._stats.items()}
+        }
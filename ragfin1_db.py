@@ -2,70 +2,290 @@
 RAGFIN1 Database Manager
 """
 import sqlite3
-from typing import Dict, List, Optional, Any
+import threading
+from typing import Dict, Iterable, List, Optional, Any
 from datetime import datetime
 import json
 
+# Buckets de monto para los agregados (alineados con los tramos de fees)
+AMOUNT_BUCKETS = [0, 100, 500, 1000, 5000]
+
+# Filas por transacción en insert_many
+INSERT_BATCH_SIZE = 1000
+
+INSERT_CORRIDOR_SQL = """
+    INSERT INTO corridors (
+        provider, origin, destination, send_amount, fee,
+        exchange_rate, total_cost, recipient_receives,
+        estimated_delivery, delivery_method, timestamp,
+        data_source, note
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _corridor_params(data: Dict[str, Any]) -> tuple:
+    return (
+        data.get('provider', 'Unknown'),
+        data.get('origin', ''),
+        data.get('destination', ''),
+        data.get('send_amount', 0.0),
+        data.get('fee', 0.0),
+        data.get('exchange_rate', 0.0),
+        data.get('total_cost', 0.0),
+        data.get('recipient_receives', 0.0),
+        data.get('estimated_delivery', ''),
+        data.get('delivery_method', ''),
+        data.get('timestamp', datetime.now().isoformat()),
+        data.get('data_source', ''),
+        data.get('note', '')
+    )
+
+def _bucket_sql(column: str) -> str:
+    """CASE SQL que mapea un monto a su bucket (límite inferior)"""
+    whens = " ".join(
+        f"WHEN {column} < {upper} THEN {lower}"
+        for lower, upper in zip(AMOUNT_BUCKETS, AMOUNT_BUCKETS[1:])
+    )
+    return f"CASE {whens} ELSE {AMOUNT_BUCKETS[-1]} END"
+
+def ensure_schema(conn: sqlite3.Connection):
+    """
+    Crea tablas, índices y el agregado por (destination, provider, amount_bucket)
+    El agregado se mantiene con un trigger en cada INSERT a corridors
+    Deja la DB en modo WAL: los writers (populate_*) no bloquean a los readers de la API
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS corridors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            provider TEXT NOT NULL,
+            origin TEXT NOT NULL,
+            destination TEXT NOT NULL,
+            send_amount REAL NOT NULL,
+            fee REAL NOT NULL,
+            exchange_rate REAL NOT NULL,
+            total_cost REAL NOT NULL,
+            recipient_receives REAL NOT NULL,
+            estimated_delivery TEXT,
+            delivery_method TEXT,
+            timestamp TEXT NOT NULL,
+            data_source TEXT,
+            note TEXT
+        )
+    """)
+    
+    # Índices según los access patterns reales (ver check_query_plans.py)
+    # idx_corridor (provider primero) no servía para filtrar por destino:
+    # queda cubierto por idx_corridors_dest_provider_ts
+    conn.execute("DROP INDEX IF EXISTS idx_corridor")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_corridors_dest_ts
+        ON corridors(destination, timestamp)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_corridors_dest_provider_ts
+        ON corridors(destination, provider, timestamp)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_corridors_dest_amount
+        ON corridors(destination, send_amount, timestamp)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_corridors_provider_ts
+        ON corridors(provider, timestamp)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_corridors_ts
+        ON corridors(timestamp)
+    """)
+    
+    aggregates_exist = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'corridor_aggregates'"
+    ).fetchone() is not None
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS corridor_aggregates (
+            destination TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            amount_bucket REAL NOT NULL,
+            count INTEGER NOT NULL,
+            sum_rate REAL NOT NULL,
+            min_rate REAL NOT NULL,
+            max_rate REAL NOT NULL,
+            sum_fee REAL NOT NULL,
+            min_fee REAL NOT NULL,
+            max_fee REAL NOT NULL,
+            last_timestamp TEXT NOT NULL,
+            PRIMARY KEY (destination, provider, amount_bucket)
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_corridor_aggregates
+        AFTER INSERT ON corridors
+        BEGIN
+            INSERT INTO corridor_aggregates (
+                destination, provider, amount_bucket, count,
+                sum_rate, min_rate, max_rate,
+                sum_fee, min_fee, max_fee, last_timestamp
+            ) VALUES (
+                NEW.destination, NEW.provider, {_bucket_sql("NEW.send_amount")}, 1,
+                NEW.exchange_rate, NEW.exchange_rate, NEW.exchange_rate,
+                NEW.fee, NEW.fee, NEW.fee, NEW.timestamp
+            )
+            ON CONFLICT (destination, provider, amount_bucket) DO UPDATE SET
+                count = count + 1,
+                sum_rate = sum_rate + excluded.sum_rate,
+                min_rate = MIN(min_rate, excluded.min_rate),
+                max_rate = MAX(max_rate, excluded.max_rate),
+                sum_fee = sum_fee + excluded.sum_fee,
+                min_fee = MIN(min_fee, excluded.min_fee),
+                max_fee = MAX(max_fee, excluded.max_fee),
+                last_timestamp = MAX(last_timestamp, excluded.last_timestamp);
+        END
+    """)
+    
+    # DB existente sin agregados: backfill de una sola vez
+    if not aggregates_exist:
+        conn.execute(f"""
+            INSERT INTO corridor_aggregates
+            SELECT destination, provider, {_bucket_sql("send_amount")} AS amount_bucket, COUNT(*),
+                   SUM(exchange_rate), MIN(exchange_rate), MAX(exchange_rate),
+                   SUM(fee), MIN(fee), MAX(fee), MAX(timestamp)
+            FROM corridors
+            GROUP BY destination, provider, amount_bucket
+        """)
+    
+    conn.commit()
+    conn.execute("PRAGMA optimize")
+
+class ConnectionManager:
+    """
+    Conexiones SQLite persistentes, una por thread
+    Los readers de la API abren en read-only (mode=ro + query_only) con mmap y cache grandes
+    reset() hace que cada thread reabra su conexión en el próximo get()
+    data_version() detecta commits de cualquier otra conexión o proceso (populate, rebuild de otro worker)
+    """
+    
+    def __init__(self,
+                 db_path: str,
+                 read_only: bool = True,
+                 mmap_size: int = 256 * 1024 * 1024,
+                 cache_size_kb: int = 64 * 1024):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.generation = 0
+        self._local = threading.local()
+        # PRAGMA data_version solo se puede comparar dentro de la misma conexión:
+        # esta vive lo que vive el manager y no la toca reset()
+        self._version_conn: Optional[sqlite3.Connection] = None
+        self._version_lock = threading.Lock()
+    
+    def _open(self) -> sqlite3.Connection:
+        if self.read_only:
+            # Autocommit: un reader nunca deja una transacción abierta que congele su vista del WAL
+            conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+        
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.execute(f"PRAGMA cache_size=-{self.cache_size_kb}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        
+        if conn is not None and self._local.generation != self.generation:
+            conn.close()
+            conn = None
+        
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self._local.generation = self.generation
+        
+        return conn
+    
+    def reset(self):
+        self.generation += 1
+    
+    def data_version(self) -> int:
+        """Cambia cada vez que otra conexión (de este u otro proceso) commitea en la DB"""
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = self._open()
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
 class RAGFIN1Database:
     def __init__(self, db_path: str = "ragfin1_data.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        self.conn = sqlite3.connect(db_path, timeout=30)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
         self._create_tables()
         print(f"✅ Database connected: {db_path}")
     
     def _create_tables(self):
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS corridors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                provider TEXT NOT NULL,
-                origin TEXT NOT NULL,
-                destination TEXT NOT NULL,
-                send_amount REAL NOT NULL,
-                fee REAL NOT NULL,
-                exchange_rate REAL NOT NULL,
-                total_cost REAL NOT NULL,
-                recipient_receives REAL NOT NULL,
-                estimated_delivery TEXT,
-                delivery_method TEXT,
-                timestamp TEXT NOT NULL,
-                data_source TEXT,
-                note TEXT
-            )
-        """)
-        self.cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_corridor 
-            ON corridors(provider, origin, destination, timestamp)
-        """)
-        self.conn.commit()
+        ensure_schema(self.conn)
+        # En WAL, NORMAL es seguro y evita un fsync por commit
+        self.conn.execute("PRAGMA synchronous=NORMAL")
     
     def insert_corridor_data(self, data: Dict[str, Any]) -> int:
-        self.cursor.execute("""
-            INSERT INTO corridors (
-                provider, origin, destination, send_amount, fee,
-                exchange_rate, total_cost, recipient_receives,
-                estimated_delivery, delivery_method, timestamp,
-                data_source, note
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            data.get('provider', 'Unknown'),
-            data.get('origin', ''),
-            data.get('destination', ''),
-            data.get('send_amount', 0.0),
-            data.get('fee', 0.0),
-            data.get('exchange_rate', 0.0),
-            data.get('total_cost', 0.0),
-            data.get('recipient_receives', 0.0),
-            data.get('estimated_delivery', ''),
-            data.get('delivery_method', ''),
-            data.get('timestamp', datetime.now().isoformat()),
-            data.get('data_source', ''),
-            data.get('note', '')
-        ))
+        self.cursor.execute(INSERT_CORRIDOR_SQL, _corridor_params(data))
         self.conn.commit()
         return self.cursor.lastrowid
     
+    def insert_many(self, rows: Iterable[Dict[str, Any]], batch_size: int = INSERT_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        Inserta muchas filas con executemany: un commit (y un fsync) por batch, no por fila
+        Cada batch es atómico: si falla, se hace rollback solo de ese batch y se propaga el error
+        Devuelve {'inserted', 'batches', 'ids'}
+        """
+        inserted = 0
+        batches = 0
+        ids: List[int] = []
+        
+        batch = []
+        for data in rows:
+            batch.append(_corridor_params(data))
+            if len(batch) >= batch_size:
+                ids.extend(self._insert_batch(batch))
+                inserted += len(batch)
+                batches += 1
+                batch = []
+        
+        if batch:
+            ids.extend(self._insert_batch(batch))
+            inserted += len(batch)
+            batches += 1
+        
+        return {'inserted': inserted, 'batches': batches, 'ids': ids}
+    
+    def _insert_batch(self, params: List[tuple]) -> List[int]:
+        if self.conn.in_transaction:
+            self.conn.commit()
+        
+        # IMMEDIATE toma el lock de escritura de entrada: nadie más inserta entre medio,
+        # así los ids AUTOINCREMENT del batch son consecutivos
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.cursor.executemany(INSERT_CORRIDOR_SQL, params)
+            last_id = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        return list(range(last_id - len(params) + 1, last_id + 1))
+    
     def get_latest_corridor(self, provider: str, origin: str, destination: str, amount: Optional[float] = None) -> Optional[Dict[str, Any]]:
         if amount:
             query = """
@@ -0,0 +1,262 @@
+"""
+RAGFIN1 HTTP Client
+Cliente HTTP compartido por todos los scrapers
+- Una sola requests.Session: pool de conexiones por host con keep-alive (sin handshake TCP/TLS por request)
+- Retries acotados con backoff exponencial + jitter en 429/5xx y errores de conexión (respeta Retry-After)
+  Solo métodos idempotentes; un POST se reintenta solo si no llegó al server (connect timeout, 429),
+  salvo que el caller pase idempotent=True (p.ej. búsquedas/cotizaciones por POST)
+- Deadline por llamada: el total de intentos + esperas nunca pasa de `deadline` segundos
+- Rate limit por host con token buckets: se cobra por request que sale del proceso, no por job
+- Métricas de latencia por host
+"""
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_DEADLINE = 10.0
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4.0
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+LATENCY_WINDOW = 512
+
+# (requests/s, burst) por host
+DEFAULT_RATE_LIMITS = {
+    "v6.exchangerate-api.com": (50.0, 10),
+}
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` tokens por segundo, hasta `burst` acumulados"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Bloquea hasta tener un token. Devuelve los segundos esperados"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+
+class HostMetrics:
+    """Requests, errores, retries y latencias (ventana acotada) de un host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rate_limit_wait = 0.0
+        self.status_counts: Dict[int, int] = {}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def pct(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rate_limit_wait_seconds": round(self.rate_limit_wait, 2),
+            "status_counts": dict(self.status_counts),
+            "latency_ms": {
+                "p50": pct(0.50),
+                "p95": pct(0.95),
+                "max": round(latencies[-1] * 1000, 1) if latencies else None
+            }
+        }
+
+
+class HttpClient:
+    """Cliente thread-safe sobre una requests.Session compartida"""
+
+    def __init__(self,
+                 retries: int = DEFAULT_RETRIES,
+                 deadline: float = DEFAULT_DEADLINE,
+                 pool_connections: int = POOL_CONNECTIONS,
+                 pool_maxsize: int = POOL_MAXSIZE,
+                 rate_limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.retries = retries
+        self.deadline = deadline
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.metrics: Dict[str, HostMetrics] = {}
+        self.lock = threading.Lock()
+
+        self.buckets: Dict[str, TokenBucket] = {}
+        for host, (rate, burst) in (DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits).items():
+            self.set_rate_limit(host, rate, burst)
+
+    def set_rate_limit(self, host: str, rate: float, burst: Optional[int] = None):
+        """Limita los requests a `host` (netloc) a `rate` por segundo"""
+        with self.lock:
+            self.buckets[host] = TokenBucket(rate, burst)
+
+    def _throttle(self, host: str):
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            return
+        waited = bucket.acquire()
+        if waited:
+            metrics = self._host_metrics(host)
+            with self.lock:
+                metrics.rate_limit_wait += waited
+
+    def _host_metrics(self, host: str) -> HostMetrics:
+        with self.lock:
+            if host not in self.metrics:
+                self.metrics[host] = HostMetrics()
+            return self.metrics[host]
+
+    def _record(self, host: str, elapsed: float, status: Optional[int] = None, retry: bool = False):
+        metrics = self._host_metrics(host)
+        with self.lock:
+            metrics.requests += 1
+            metrics.latencies.append(elapsed)
+            if status is None:
+                metrics.errors += 1
+            else:
+                metrics.status_counts[status] = metrics.status_counts.get(status, 0) + 1
+                if status >= 500 or status == 429:
+                    metrics.errors += 1
+            if retry:
+                metrics.retries += 1
+
+    @staticmethod
+    def _backoff(attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        # Full jitter
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+    def request(self,
+                method: str,
+                url: str,
+                deadline: Optional[float] = None,
+                retries: Optional[int] = None,
+                idempotent: Optional[bool] = None,
+                **kwargs) -> requests.Response:
+        """
+        Igual que requests.request, con retries y deadline
+        Si se agotan los retries devuelve la última respuesta (429/5xx) o relanza el último error de conexión
+        idempotent: default según el método. Si es False solo se reintenta lo que seguro no se procesó
+        (connect timeout, 429): un timeout de lectura o un 5xx pueden haber aplicado el request
+        """
+        deadline = self.deadline if deadline is None else deadline
+        retries = self.retries if retries is None else retries
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        # `timeout` de requests se interpreta como tope por intento
+        per_attempt = kwargs.pop("timeout", None)
+
+        host = urlsplit(url).netloc
+        expires = time.monotonic() + deadline
+        attempt = 0
+
+        while True:
+            # Cada intento (también los retries) es un request real al upstream
+            self._throttle(host)
+
+            remaining = max(expires - time.monotonic(), 0.001)
+            timeout = remaining if per_attempt is None else min(per_attempt, remaining)
+
+            started = time.monotonic()
+            response = None
+            error = None
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            elapsed = time.monotonic() - started
+
+            if idempotent:
+                retryable = error is not None or response.status_code in RETRY_STATUSES
+            else:
+                retryable = isinstance(error, requests.ConnectTimeout) or (
+                    response is not None and response.status_code == 429
+                )
+            wait = self._backoff(attempt, response) if retryable else 0.0
+            # Solo se reintenta si la espera + otro intento caben en el deadline
+            retry = retryable and attempt < retries and time.monotonic() + wait < expires
+
+            self._record(host, elapsed, None if error else response.status_code, retry=retry)
+
+            if not retry:
+                if error is not None:
+                    raise error
+                return response
+
+            time.sleep(wait)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            return {host: metrics.to_dict() for host, metrics in self.metrics.items()}
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Cliente compartido del proceso"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_client().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_client().post(url, **kwargs)
+
+
+def get_metrics() -> Dict[str, Dict[str, Any]]:
+    return get_client().get_metrics()
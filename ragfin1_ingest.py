@@ -0,0 +1,206 @@
+"""
+RAGFIN1 Ingestion Orchestrator
+Reparte jobs de cotización (provider × destino × monto) en un pool de threads
+- El rate limit de los upstreams lo aplica ragfin1_http por host, por request real:
+  los jobs que cotizan desde tasas ya memoizadas no esperan
+- Un solo writer que inserta en batches con RAGFIN1Database.insert_many
+- Progreso con jobs/s, error rate y ETA
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ragfin1_db import RAGFIN1Database
+
+DEFAULT_WORKERS = 16
+DEFAULT_BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0
+REPORT_INTERVAL = 2.0
+
+class BatchWriter(threading.Thread):
+    """
+    Writer único: junta resultados de los workers y los inserta por batch
+    Abre su propia conexión (sqlite3 no comparte conexiones entre threads)
+    """
+
+    def __init__(self, db_path: str, batch_size: int = DEFAULT_BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        super().__init__(name="ragfin1-batch-writer", daemon=True)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self.inserted = 0
+        self.batches = 0
+        self.error: Optional[BaseException] = None
+
+    def put(self, row: Dict[str, Any]):
+        self.queue.put(row)
+
+    def close(self):
+        self.queue.put(None)
+        self.join()
+        if self.error:
+            raise self.error
+
+    def run(self):
+        db = RAGFIN1Database(self.db_path)
+        pending: List[Dict[str, Any]] = []
+        last_flush = time.monotonic()
+
+        try:
+            while True:
+                try:
+                    row = self.queue.get(timeout=self.flush_interval)
+                    if row is None:
+                        break
+                    pending.append(row)
+                except queue.Empty:
+                    pass
+
+                if len(pending) >= self.batch_size or (pending and time.monotonic() - last_flush >= self.flush_interval):
+                    self._flush(db, pending)
+                    pending = []
+                    last_flush = time.monotonic()
+
+            if pending:
+                self._flush(db, pending)
+        except BaseException as e:
+            self.error = e
+            # Drenar la cola para que nadie quede bloqueado
+            while not self.queue.empty():
+                self.queue.get_nowait()
+        finally:
+            db.close()
+
+    def _flush(self, db: RAGFIN1Database, rows: List[Dict[str, Any]]):
+        result = db.insert_many(rows, batch_size=self.batch_size)
+        self.inserted += result['inserted']
+        self.batches += result['batches']
+
+
+class IngestProgress:
+    """Contadores de la corrida (thread-safe)"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def start(self, total: int):
+        """Reinicia los contadores para una corrida de `total` jobs"""
+        with self.lock:
+            self.total = total
+            self.done = 0
+            self.errors = 0
+            self.started = time.monotonic()
+
+    def record(self, ok: bool):
+        with self.lock:
+            self.done += 1
+            if not ok:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            rate = self.done / elapsed if elapsed > 0 else 0.0
+            remaining = self.total - self.done
+            return {
+                "total": self.total,
+                "done": self.done,
+                "errors": self.errors,
+                "elapsed_seconds": round(elapsed, 2),
+                "jobs_per_sec": round(rate, 1),
+                "error_rate": round(self.errors / self.done, 4) if self.done else 0.0,
+                "eta_seconds": round(remaining / rate, 1) if rate > 0 else None
+            }
+
+
+def build_jobs(providers: Iterable[str],
+               destinations: Iterable[str],
+               amounts: Iterable[float],
+               origin: str = "US") -> List[Dict[str, Any]]:
+    """Producto cartesiano provider × destino × monto"""
+    amounts = list(amounts)
+    providers = list(providers)
+    return [
+        {"provider": provider, "origin": origin, "destination": destination, "amount": amount}
+        for destination in destinations
+        for amount in amounts
+        for provider in providers
+    ]
+
+
+def _run_job(job: Dict[str, Any], scraper: Any) -> Optional[Dict[str, Any]]:
+    result = scraper.get_estimate(job["origin"], job["destination"], job["amount"])
+    if result and result.get('success'):
+        return result
+    return None
+
+
+def run_ingest(jobs: List[Dict[str, Any]],
+               scrapers: Dict[str, Any],
+               db_path: str = "ragfin1_data.db",
+               limits: Optional[Dict[str, Tuple[float, int]]] = None,
+               workers: int = DEFAULT_WORKERS,
+               batch_size: int = DEFAULT_BATCH_SIZE,
+               report_interval: float = REPORT_INTERVAL,
+               verbose: bool = True,
+               progress: Optional[IngestProgress] = None) -> Dict[str, Any]:
+    """
+    Ejecuta los jobs en paralelo y escribe los resultados en batches
+
+    scrapers:  provider -> objeto con get_estimate(origin, destination, amount)
+    limits:    host -> (requests/s, burst), pisa los límites de ragfin1_http para esta corrida en adelante
+    progress:  IngestProgress externo, para seguir la corrida desde otro thread
+    """
+    if limits:
+        # Import local: main importa este módulo (vía ragfin1_rebuild) y requests no puede cargarse al arrancar
+        import ragfin1_http
+        client = ragfin1_http.get_client()
+        for host, (rate, burst) in limits.items():
+            client.set_rate_limit(host, rate, burst)
+
+    if progress is None:
+        progress = IngestProgress(len(jobs))
+    else:
+        progress.start(len(jobs))
+    writer = BatchWriter(db_path, batch_size=batch_size)
+    writer.start()
+
+    last_report = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ragfin1-ingest") as pool:
+        futures = []
+        for job in jobs:
+            futures.append(pool.submit(_run_job, job, scrapers[job["provider"]]))
+
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                if verbose:
+                    print(f"❌ Job error: {e}")
+                progress.record(False)
+            else:
+                if result:
+                    writer.put(result)
+                progress.record(result is not None)
+
+            if verbose and time.monotonic() - last_report >= report_interval:
+                last_report = time.monotonic()
+                s = progress.snapshot()
+                eta = f"{s['eta_seconds']:.0f}s" if s['eta_seconds'] is not None else "?"
+                print(f"   ⏳ {s['done']:,}/{s['total']:,} jobs · {s['jobs_per_sec']:.1f} jobs/s · "
+                      f"errors {s['error_rate']:.1%} · ETA {eta}")
+
+    writer.close()
+
+    stats = progress.snapshot()
+    stats["inserted"] = writer.inserted
+    stats["batches"] = writer.batches
+    return stats
@@ -0,0 +1,765 @@
+"""
+RAGFIN1 Pricing Engine
+Un solo motor de precios para todos los providers, a partir de una tabla declarativa
+provider × corredor → markup sobre la tasa mid-market + tramos de fee
+- Fee por tramo con bisect sobre los topes ordenados (searchsorted en la versión vectorizada)
+- quote(): mismo dict que devolvían los wise_/wu_/intermex_/remitly_scraper_XX.py
+- quote_amounts(): cotiza un array entero de montos en una sola pasada NumPy
+"""
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Monedas de los scrapers genéricos (*_real): destino desconocido → MXN
+WISE_CURRENCIES = {
+    "MX": "MXN", "VE": "VES", "CO": "COP",
+    "PE": "PEN", "BR": "BRL", "CL": "CLP", "AR": "ARS"
+}
+INTERMEX_CURRENCIES = {
+    "MX": "MXN", "VE": "VES", "CO": "COP",
+    "PE": "PEN", "BR": "BRL", "GT": "GTQ", "HN": "HNL"
+}
+DEFAULT_CURRENCY = "MXN"
+
+# Quote grid
+DEFAULT_GRID_STEP = 50.0
+MAX_GRID_POINTS = 2000
+
+# Corredor comodín: lo usan los scrapers genéricos para cualquier destino
+ANY_CORRIDOR = "*"
+
+# Formatos de salida
+#   quote:    success / total_cost / recipient_receives (scrapers *_real y *_GT)
+#   estimate: origin_currency / recipient_gets / effective_rate (scrapers *_DO, *_SV, remitly_XX)
+QUOTE = "quote"
+ESTIMATE = "estimate"
+
+
+def _flat(*tiers: Tuple[Optional[float], float]) -> List[Tuple[Optional[float], float, float]]:
+    """Tramos de fee fijo: (tope, fee)"""
+    return [(cap, 0.0, fee) for cap, fee in tiers]
+
+
+def _remitly_estimate(currency: str) -> Dict[str, Any]:
+    return {
+        "format": ESTIMATE,
+        "currency": currency,
+        "markup": 0.975,
+        "tier_rule": "le",
+        "tiers": _flat((None, 3.99)),
+        "effective_digits": 4
+    }
+
+
+# Tabla de precios
+# tiers: [(tope, pct, fijo), ...] ordenados, el último con tope None. fee = amount * pct + fijo
+# tier_rule: "le" → el tramo aplica si amount <= tope; "lt" → si 0 <= amount < tope (fee 0.0 bajo 0)
+# currency: moneda fija, dict destino → moneda (con DEFAULT_CURRENCY), o None (dolarizado, tasa 1.0)
+# markup: factor sobre la tasa mid-market (None = tasa sin tocar)
+PRICING_TABLE: Dict[Tuple[str, str], Dict[str, Any]] = {
+    # Genéricos (wise_scraper_real, wu_scraper_real_v2, intermex_scraper_real_v2)
+    ("Wise", ANY_CORRIDOR): {
+        "format": QUOTE,
+        "currency": WISE_CURRENCIES,
+        "markup": None,
+        "tier_rule": "le",
+        "tiers": [(100, 0.015, 1.50), (1000, 0.01, 2.00), (5000, 0.008, 3.00), (None, 0.006, 5.00)],
+        "fee_digits": 2,
+        "estimated_delivery": "1-2 days",
+        "delivery_method": "Bank transfer",
+        "data_source": "REAL (ExchangeRate-API)",
+        "note": "Real exchange rate + Wise fee structure"
+    },
+    ("Western Union", ANY_CORRIDOR): {
+        "format": QUOTE,
+        "currency": WISE_CURRENCIES,
+        "markup": 0.97,
+        "tier_rule": "lt",
+        "tiers": _flat((100, 5.00), (500, 8.00), (1000, 12.00), (5000, 20.00), (None, 30.00)),
+        "rate_digits": 4,
+        "receives_digits": 2,
+        "estimated_delivery": "Minutes",
+        "delivery_method": "Cash pickup",
+        "data_source": "REAL rate with WU markup",
+        "note": "Real rate + typical WU 3% markup + fees"
+    },
+    ("Intermex", ANY_CORRIDOR): {
+        "format": QUOTE,
+        "currency": INTERMEX_CURRENCIES,
+        "markup": 0.985,
+        "tier_rule": "lt",
+        "tiers": _flat((100, 4.99), (500, 4.99), (1000, 4.99), (3000, 9.99), (None, 14.99)),
+        "rate_digits": 4,
+        "receives_digits": 2,
+        "estimated_delivery": "Minutes",
+        "delivery_method": "Cash pickup / Bank deposit",
+        "data_source": "REAL rate with Intermex markup",
+        "note": "Real rate + typical Intermex 1.5% markup + fees"
+    },
+
+    # Guatemala
+    ("Wise", "GT"): {
+        "format": QUOTE,
+        "currency": "GTQ",
+        "markup": None,
+        "tier_rule": "le",
+        "tiers": [(500, 0.008, 0.0), (1000, 0.007, 0.0), (5000, 0.006, 0.0), (None, 0.005, 0.0)],
+        "min_fee": 3.00,
+        "output_digits": 2,
+        "rate_digits": 4,
+        "receives_digits": 2,
+        "estimated_delivery": "1-2 business days",
+        "delivery_method": "Bank transfer",
+        "data_source": "REAL mid-market rate",
+        "note": "Real mid-market rate + low percentage fee"
+    },
+    ("Western Union", "GT"): {
+        "format": QUOTE,
+        "currency": "GTQ",
+        "markup": 0.97,
+        "tier_rule": "lt",
+        "tiers": _flat((100, 5.00), (500, 8.00), (1000, 12.00), (5000, 20.00), (None, 30.00)),
+        "rate_digits": 4,
+        "receives_digits": 2,
+        "estimated_delivery": "Minutes",
+        "delivery_method": "Cash pickup",
+        "data_source": "REAL rate with WU markup",
+        "note": "Real rate + typical WU 3% markup + fees"
+    },
+    ("Intermex", "GT"): {
+        "format": QUOTE,
+        "currency": "GTQ",
+        "markup": 0.985,
+        "tier_rule": "lt",
+        "tiers": _flat((100, 4.00), (500, 6.00), (1000, 9.00), (5000, 15.00), (None, 25.00)),
+        "rate_digits": 4,
+        "receives_digits": 2,
+        "estimated_delivery": "Minutes",
+        "delivery_method": "Cash pickup",
+        "data_source": "REAL rate with Intermex markup",
+        "note": "Real rate + typical Intermex 1.5% markup + fees"
+    },
+    ("Remitly", "GT"): {
+        "format": QUOTE,
+        "currency": "GTQ",
+        "markup": 0.98,
+        "tier_rule": "lt",
+        "tiers": _flat((100, 3.99), (500, 3.99), (1000, 3.99), (5000, 0.00), (None, 0.00)),
+        "rate_digits": 4,
+        "receives_digits": 2,
+        "estimated_delivery": "Minutes (Express)",
+        "delivery_method": "Bank deposit / Cash pickup",
+        "data_source": "REAL rate with Remitly markup",
+        "note": "Real rate + typical Remitly 2% markup + flat fee"
+    },
+
+    # República Dominicana
+    ("Wise", "DO"): {
+        "format": ESTIMATE,
+        "currency": "DOP",
+        "markup": 0.995,
+        "tier_rule": "le",
+        "tiers": _flat((100, 3.50), (300, 5.00), (500, 7.50), (1000, 12.00), (None, 18.00)),
+        "effective_digits": 2
+    },
+    ("Western Union", "DO"): {
+        "format": ESTIMATE,
+        "currency": "DOP",
+        "markup": 0.965,
+        "tier_rule": "le",
+        "tiers": _flat((100, 5.00), (300, 8.00), (500, 10.00), (1000, 15.00), (None, 20.00)),
+        "effective_digits": 2
+    },
+    ("Intermex", "DO"): {
+        "format": ESTIMATE,
+        "currency": "DOP",
+        "markup": 0.970,
+        "tier_rule": "le",
+        "tiers": _flat((100, 4.99), (300, 7.99), (500, 9.99), (1000, 14.99), (None, 19.99)),
+        "effective_digits": 2
+    },
+    ("Remitly", "DO"): {**_remitly_estimate("DOP"), "effective_digits": 2},
+
+    # El Salvador (dolarizado: sin tasa)
+    ("Wise", "SV"): {
+        "format": ESTIMATE,
+        "currency": None,
+        "tier_rule": "le",
+        "tiers": _flat((100, 2.50), (300, 4.00), (500, 6.00), (1000, 10.00), (None, 15.00)),
+        "effective_digits": 4
+    },
+    ("Western Union", "SV"): {
+        "format": ESTIMATE,
+        "currency": None,
+        "tier_rule": "le",
+        "tiers": _flat((100, 4.00), (300, 7.00), (500, 9.00), (1000, 14.00), (None, 18.00)),
+        "effective_digits": 4
+    },
+    ("Intermex", "SV"): {
+        "format": ESTIMATE,
+        "currency": None,
+        "tier_rule": "le",
+        "tiers": _flat((100, 3.99), (300, 6.99), (500, 8.99), (1000, 13.99), (None, 17.99)),
+        "effective_digits": 4
+    },
+    ("Remitly", "SV"): {**_remitly_estimate(None), "markup": None},
+
+    # Remitly Sudamérica / México
+    ("Remitly", "MX"): _remitly_estimate("MXN"),
+    ("Remitly", "CO"): _remitly_estimate("COP"),
+    ("Remitly", "BR"): _remitly_estimate("BRL"),
+    ("Remitly", "AR"): _remitly_estimate("ARS"),
+    ("Remitly", "VE"): _remitly_estimate("VES"),
+    ("Remitly", "CL"): _remitly_estimate("CLP"),
+    ("Remitly", "PE"): _remitly_estimate("PEN"),
+    ("Remitly", "BO"): _remitly_estimate("BOB"),
+}
+
+
+def _round_array(values: np.ndarray, digits: int) -> np.ndarray:
+    """
+    np.round escala por 10**digits y puede diferir de round() de Python en los empates
+    (2.675 → 2.68 vs 2.67): esos casos se recalculan con round() para dar el mismo resultado
+    """
+    rounded = np.round(values, digits)
+    scaled = values * 10.0 ** digits
+    near_tie = np.flatnonzero(np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6)
+    for i in near_tie:
+        rounded[i] = round(float(values[i]), digits)
+    return rounded
+
+
+class PricingEngine:
+    """Cotiza cualquier provider × corredor de PRICING_TABLE"""
+
+    def __init__(self, table: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None, rate_provider=None):
+        self.table = PRICING_TABLE if table is None else table
+        self._rate_provider = rate_provider
+        self._bounds: Dict[Tuple[str, str], Tuple[List[float], np.ndarray, np.ndarray]] = {}
+        # destino → breakpoints del mejor provider (ver best_provider)
+        self._best: Dict[str, Dict[str, Any]] = {}
+        self._best_lock = threading.Lock()
+
+    @property
+    def rate_provider(self):
+        # Lazy: los corredores dolarizados no necesitan tasa
+        if self._rate_provider is None:
+            from exchangerate_scraper import ExchangeRateScraper
+            self._rate_provider = ExchangeRateScraper()
+        return self._rate_provider
+
+    def resolve(self, provider: str, destination: str, corridor: Optional[str] = None) -> Tuple[str, str]:
+        """Clave de la tabla: el corredor pedido, el del destino, o el comodín"""
+        for key in ((provider, corridor), (provider, destination), (provider, ANY_CORRIDOR)):
+            if key[1] is not None and key in self.table:
+                return key
+        raise KeyError(f"No pricing for {provider} → {corridor or destination}")
+
+    def _tier_arrays(self, key: Tuple[str, str]) -> Tuple[List[float], np.ndarray, np.ndarray]:
+        if key not in self._bounds:
+            tiers = self.table[key]["tiers"]
+            bounds = [cap for cap, _, _ in tiers[:-1]]
+            pct = np.array([p for _, p, _ in tiers], dtype=np.float64)
+            flat = np.array([f for _, _, f in tiers], dtype=np.float64)
+            self._bounds[key] = (bounds, pct, flat)
+        return self._bounds[key]
+
+    def currency_for(self, key: Tuple[str, str], destination: str) -> Optional[str]:
+        currency = self.table[key]["currency"]
+        if isinstance(currency, dict):
+            return currency.get(destination, DEFAULT_CURRENCY)
+        return currency
+
+    def fee(self, key: Tuple[str, str], amount: float) -> float:
+        """Fee de un monto: bisect sobre los topes del tramo"""
+        spec = self.table[key]
+        bounds, _, _ = self._tier_arrays(key)
+
+        if spec["tier_rule"] == "lt":
+            if amount < 0:
+                return 0.0
+            i = bisect_right(bounds, amount)
+        else:
+            i = bisect_left(bounds, amount)
+
+        _, pct, flat = spec["tiers"][i]
+        fee = amount * pct + flat if pct else flat
+
+        if spec.get("min_fee") is not None and fee < spec["min_fee"]:
+            fee = spec["min_fee"]
+        if spec.get("fee_digits") is not None:
+            fee = round(fee, spec["fee_digits"])
+        return fee
+
+    def fees(self, key: Tuple[str, str], amounts: np.ndarray) -> np.ndarray:
+        """Fees de un array de montos (vectorizado)"""
+        spec = self.table[key]
+        bounds, pct, flat = self._tier_arrays(key)
+        side = "right" if spec["tier_rule"] == "lt" else "left"
+        idx = np.searchsorted(np.array(bounds, dtype=np.float64), amounts, side=side)
+
+        fees = np.where(pct[idx] != 0, amounts * pct[idx] + flat[idx], flat[idx])
+        if spec["tier_rule"] == "lt":
+            fees = np.where(amounts < 0, 0.0, fees)
+        if spec.get("min_fee") is not None:
+            fees = np.where(fees < spec["min_fee"], spec["min_fee"], fees)
+        if spec.get("fee_digits") is not None:
+            fees = _round_array(fees, spec["fee_digits"])
+        return fees
+
+    def mid_market_rate(self, key: Tuple[str, str], destination: str, amount: float = 1.0) -> Optional[float]:
+        """Tasa mid-market USD → moneda del corredor (1.0 si es dolarizado, None si falla)"""
+        currency = self.currency_for(key, destination)
+        if currency is None:
+            return 1.0
+        rate_data = self.rate_provider.get_rate("USD", currency, amount)
+        if not rate_data.get("success"):
+            return None
+        return rate_data["rate"]
+
+    def providers_for(self, destination: str) -> List[Tuple[str, Tuple[str, str]]]:
+        """
+        (provider, clave) con precios para el destino: la entrada del corredor si existe,
+        si no la genérica, solo si su mapa de monedas incluye el destino (no el MXN por defecto)
+        """
+        providers = []
+        for provider in sorted({p for p, _ in self.table}):
+            if (provider, destination) in self.table:
+                providers.append((provider, (provider, destination)))
+            elif (provider, ANY_CORRIDOR) in self.table:
+                currency = self.table[(provider, ANY_CORRIDOR)]["currency"]
+                if not isinstance(currency, dict) or destination in currency:
+                    providers.append((provider, (provider, ANY_CORRIDOR)))
+        return providers
+
+    def quote_grid(self, destination: str, amounts: str = "100..10000", step: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Todos los providers del destino × todos los montos, en arrays paralelos
+        rank 1 = el que más moneda local entrega por USD pagado en ese monto
+        """
+        values = _parse_amounts(amounts, step)
+
+        providers = []
+        rows = {}
+        rates: Dict[str, Optional[float]] = {}
+        for provider, key in self.providers_for(destination):
+            currency = self.currency_for(key, destination)
+            if currency not in rates:
+                rates[currency] = self.mid_market_rate(key, destination)
+            if rates[currency] is None:
+                continue
+            rows[provider] = self.quote_amounts(provider, destination, values, corridor=key[1], rate=rates[currency])
+            providers.append(provider)
+
+        grid = {}
+        best = []
+        if providers:
+            effective = np.vstack([rows[p]["effective_rate"] for p in providers])
+            # argsort doble: posición de cada provider en el orden descendente, por columna
+            ranks = np.argsort(np.argsort(-effective, axis=0, kind="stable"), axis=0, kind="stable") + 1
+            best = [providers[i] for i in np.argmin(ranks, axis=0)]
+            for i, provider in enumerate(providers):
+                row = rows[provider]
+                grid[provider] = {
+                    "exchange_rate": float(row["exchange_rate"][0]),
+                    "fee": row["fee"].tolist(),
+                    "total_cost": row["total_cost"].tolist(),
+                    "recipient_receives": row["recipient_receives"].tolist(),
+                    "effective_rate": np.round(row["effective_rate"], 6).tolist(),
+                    "rank": ranks[i].tolist()
+                }
+
+        return {
+            "destination": destination,
+            "amounts": values.tolist(),
+            "providers": providers,
+            "mid_market_rates": {currency or "USD": rate for currency, rate in rates.items() if rate is not None},
+            "grid": grid,
+            "best": best,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def _mid_rates(self, destination: str, providers: List[Tuple[str, Tuple[str, str]]]) -> Dict[str, float]:
+        """provider → tasa mid-market (se omiten los que no tienen tasa)"""
+        by_currency: Dict[Optional[str], Optional[float]] = {}
+        rates = {}
+        for provider, key in providers:
+            currency = self.currency_for(key, destination)
+            if currency not in by_currency:
+                by_currency[currency] = self.mid_market_rate(key, destination)
+            if by_currency[currency] is not None:
+                rates[provider] = by_currency[currency]
+        return rates
+
+    def _mobius(self, key: Tuple[str, str], provider_rate: float, amount: float) -> Tuple[float, float, float, float]:
+        """
+        Dentro de un tramo, effective_rate(a) = (α·a + β) / (γ·a + δ)
+        QUOTE:    a·R / (a + p·a + c)      (el fee se suma al monto)
+        ESTIMATE: (a - p·a - c)·R / a      (el fee se descuenta)
+        """
+        spec = self.table[key]
+        bounds, pct, flat = self._tier_arrays(key)
+        i = bisect_left(bounds, amount)
+        p, c = float(pct[i]), float(flat[i])
+        min_fee = spec.get("min_fee")
+        if min_fee is not None and p * amount + c < min_fee:
+            p, c = 0.0, min_fee
+
+        if spec["format"] == QUOTE:
+            return provider_rate, 0.0, 1.0 + p, c
+        return provider_rate * (1.0 - p), -c * provider_rate, 1.0, 0.0
+
+    def _build_best(self, destination: str) -> Optional[Dict[str, Any]]:
+        providers = self.providers_for(destination)
+        rates = self._mid_rates(destination, providers)
+        providers = [(p, key) for p, key in providers if p in rates]
+        if not providers:
+            return None
+
+        provider_rates = {p: self._provider_rate(self.table[key], rates[p]) for p, key in providers}
+
+        # Bordes de tramo y quiebres del fee mínimo: ahí cambia la forma de cada curva
+        edges = set()
+        for _, key in providers:
+            spec = self.table[key]
+            edges.update(cap for cap, _, _ in spec["tiers"] if cap is not None)
+            if spec.get("min_fee") is not None:
+                edges.update((spec["min_fee"] - flat) / pct for _, pct, flat in spec["tiers"] if pct > 0)
+        edges = sorted(e for e in edges if e > 0)
+
+        # Cruces entre cada par de providers dentro de cada intervalo
+        breakpoints = set(edges)
+        bounds = [0.0] + edges + [math.inf]
+        for lo, hi in zip(bounds, bounds[1:]):
+            probe = (lo + hi) / 2 if hi < math.inf else lo * 2 + 1
+            curves = {p: self._mobius(key, provider_rates[p], probe) for p, key in providers}
+            for p1, p2 in combinations(curves, 2):
+                a1, b1, c1, d1 = curves[p1]
+                a2, b2, c2, d2 = curves[p2]
+                qa = a1 * c2 - a2 * c1
+                qb = a1 * d2 + b1 * c2 - a2 * d1 - b2 * c1
+                qc = b1 * d2 - b2 * d1
+                if abs(qa) < 1e-15:
+                    roots = [-qc / qb] if abs(qb) > 1e-15 else []
+                else:
+                    disc = qb * qb - 4 * qa * qc
+                    roots = [] if disc < 0 else [(-qb - math.sqrt(disc)) / (2 * qa), (-qb + math.sqrt(disc)) / (2 * qa)]
+                breakpoints.update(r for r in roots if lo < r < hi)
+
+        breakpoints = sorted(breakpoints)
+
+        # Ranking constante dentro de cada segmento abierto: se evalúa en un punto interior
+        probes = np.array(
+            [breakpoints[0] / 2 if breakpoints else 1.0]
+            + [(lo + hi) / 2 for lo, hi in zip(breakpoints, breakpoints[1:])]
+            + ([breakpoints[-1] * 2] if breakpoints else []),
+            dtype=np.float64
+        )
+        names = [p for p, _ in providers]
+        effective = np.vstack([
+            self.quote_amounts(p, destination, probes, corridor=key[1], rate=rates[p])["effective_rate"]
+            for p, key in providers
+        ])
+        order = np.argsort(-effective, axis=0, kind="stable")
+        rankings = [[names[i] for i in order[:, j]] for j in range(order.shape[1])]
+
+        return {
+            "rates": rates,
+            "providers": providers,
+            "breakpoints": breakpoints,
+            "rankings": rankings,
+            "built_at": datetime.now().isoformat()
+        }
+
+    def _best_index(self, destination: str) -> Optional[Dict[str, Any]]:
+        """Breakpoints del destino; se reconstruyen cuando cambia alguna tasa"""
+        index = self._best.get(destination)
+        if index is not None:
+            current = self._mid_rates(destination, index["providers"])
+            if current == index["rates"]:
+                return index
+
+        with self._best_lock:
+            index = self._build_best(destination)
+            if index is None:
+                self._best.pop(destination, None)
+            else:
+                self._best[destination] = index
+            return index
+
+    def warm(self, destinations: Iterable[str]) -> int:
+        """Construye (o revalida) el índice de breakpoints de cada destino. Devuelve cuántos hay"""
+        return sum(1 for destination in destinations if self._best_index(destination) is not None)
+
+    def best_provider(self, destination: str, amount: float) -> Optional[Dict[str, Any]]:
+        """
+        Mejor provider (y el segundo) para enviar `amount` USD a `destination`
+        Búsqueda binaria sobre los breakpoints donde cambia el orden de los providers
+        """
+        index = self._best_index(destination)
+        if index is None:
+            return None
+
+        breakpoints = index["breakpoints"]
+        providers = dict(index["providers"])
+        rates = index["rates"]
+
+        i = bisect_left(breakpoints, amount)
+        if i < len(breakpoints) and breakpoints[i] == amount:
+            # Justo en un borde: la regla del tramo (<= / <) decide, se evalúa directo
+            effective = {
+                p: self.quote_amounts(p, destination, [amount], corridor=key[1], rate=rates[p])["effective_rate"][0]
+                for p, key in providers.items()
+            }
+            ranking = sorted(providers, key=lambda p: -effective[p])
+        else:
+            ranking = index["rankings"][i]
+
+        quotes = {}
+        for p in ranking[:2]:
+            row = self.quote_amounts(p, destination, [amount], corridor=providers[p][1], rate=rates[p])
+            quotes[p] = {
+                "provider": p,
+                "fee": float(row["fee"][0]),
+                "total_cost": float(row["total_cost"][0]),
+                "exchange_rate": float(row["exchange_rate"][0]),
+                "recipient_receives": float(row["recipient_receives"][0]),
+                "effective_rate": round(float(row["effective_rate"][0]), 6)
+            }
+
+        best = quotes[ranking[0]]
+        runner_up = quotes.get(ranking[1]) if len(ranking) > 1 else None
+
+        savings = None
+        if runner_up:
+            # Diferencia a igual USD pagado: lo que el remitente pagaría de más (en USD) con el segundo
+            gap_rate = best["effective_rate"] - runner_up["effective_rate"]
+            savings = {
+                "effective_rate_gap": round(gap_rate, 6),
+                "recipient_gap_local": round(gap_rate * best["total_cost"], 2),
+                "recipient_gap_usd": round(gap_rate * best["total_cost"] / rates[ranking[0]], 2),
+                "percentage": round(gap_rate / runner_up["effective_rate"] * 100, 3) if runner_up["effective_rate"] else None
+            }
+
+        lo = breakpoints[i - 1] if i > 0 else 0.0
+        hi = breakpoints[i] if i < len(breakpoints) else None
+        return {
+            "destination": destination,
+            "amount": amount,
+            "best": best,
+            "runner_up": runner_up,
+            "savings": savings,
+            "ranking": ranking,
+            "segment": {"from": lo, "to": hi},
+            "breakpoints": len(breakpoints),
+            "index_built_at": index["built_at"]
+        }
+
+    def _provider_rate(self, spec: Dict[str, Any], rate):
+        return rate * spec["markup"] if spec.get("markup") is not None else rate
+
+    def quote(self,
+              provider: str,
+              origin: str,
+              destination: str,
+              amount: float,
+              corridor: Optional[str] = None,
+              rate: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Cotización de un monto, en el formato del scraper equivalente"""
+        key = self.resolve(provider, destination, corridor)
+        spec = self.table[key]
+
+        if rate is None:
+            rate = self.mid_market_rate(key, destination, amount)
+        if rate is None:
+            if spec["format"] == QUOTE:
+                return {"success": False, "error": "Rate fetch failed"}
+            return None
+
+        fee = self.fee(key, amount)
+        provider_rate = self._provider_rate(spec, rate)
+
+        if spec["format"] == QUOTE:
+            converted = amount * provider_rate
+            digits = spec.get("output_digits")
+            return {
+                "success": True,
+                "provider": provider,
+                "origin": origin,
+                "destination": destination,
+                "send_amount": amount,
+                "fee": round(fee, digits) if digits is not None else fee,
+                "exchange_rate": round(provider_rate, spec["rate_digits"]) if spec.get("rate_digits") else provider_rate,
+                "total_cost": round(amount + fee, digits) if digits is not None else amount + fee,
+                "recipient_receives": round(converted, spec["receives_digits"]) if spec.get("receives_digits") else converted,
+                "estimated_delivery": spec["estimated_delivery"],
+                "delivery_method": spec["delivery_method"],
+                "timestamp": datetime.now().isoformat(),
+                "data_source": spec["data_source"],
+                "note": spec["note"]
+            }
+
+        currency = self.currency_for(key, destination)
+        recipient_gets = (amount - fee) * provider_rate
+        effective_rate = recipient_gets / amount if amount > 0 else 0
+        return {
+            "provider": provider,
+            "origin": origin,
+            "destination": destination,
+            "origin_currency": "USD",
+            "destination_currency": currency or "USD",
+            "send_amount": amount,
+            "fee": fee,
+            "exchange_rate": provider_rate,
+            "recipient_gets": round(recipient_gets, 2),
+            "effective_rate": round(effective_rate, spec["effective_digits"]),
+            "timestamp": datetime.now().isoformat(),
+            "corridor": f"{origin}-{destination}"
+        }
+
+    def quote_amounts(self,
+                      provider: str,
+                      destination: str,
+                      amounts: Iterable[float],
+                      corridor: Optional[str] = None,
+                      rate: Optional[float] = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Cotiza un array de montos de una vez (una sola consulta de tasa)
+        Devuelve arrays: send_amount, fee, exchange_rate, total_cost, recipient_receives, effective_rate
+        Mismos valores (y redondeos) que quote() monto por monto
+        total_cost es lo que paga el remitente y effective_rate = recipient_receives / total_cost,
+        comparable entre formatos (en ESTIMATE el fee se descuenta del monto enviado)
+        """
+        key = self.resolve(provider, destination, corridor)
+        spec = self.table[key]
+        amounts = np.asarray(amounts, dtype=np.float64)
+
+        if rate is None:
+            rate = self.mid_market_rate(key, destination)
+        if rate is None:
+            return None
+
+        fees = self.fees(key, amounts)
+        provider_rate = self._provider_rate(spec, rate)
+
+        if spec["format"] == QUOTE:
+            digits = spec.get("output_digits")
+            recipient = amounts * provider_rate
+            if spec.get("receives_digits"):
+                recipient = _round_array(recipient, spec["receives_digits"])
+            total = amounts + fees
+            if digits is not None:
+                total = _round_array(total, digits)
+                fees = _round_array(fees, digits)
+            exchange_rate = round(provider_rate, spec["rate_digits"]) if spec.get("rate_digits") else provider_rate
+            effective = np.divide(recipient, total, out=np.zeros_like(amounts), where=total > 0)
+        else:
+            raw = (amounts - fees) * provider_rate
+            recipient = _round_array(raw, 2)
+            total = amounts.copy()
+            exchange_rate = provider_rate
+            effective = _round_array(
+                np.divide(raw, amounts, out=np.zeros_like(amounts), where=amounts > 0),
+                spec["effective_digits"]
+            )
+
+        return {
+            "send_amount": amounts,
+            "fee": fees,
+            "exchange_rate": np.full_like(amounts, exchange_rate),
+            "total_cost": total,
+            "recipient_receives": recipient,
+            "effective_rate": effective
+        }
+
+
+def _parse_amounts(amounts: str, step: Optional[float]) -> np.ndarray:
+    """'100..10000' (con step) o lista '100,500,1000'"""
+    if ".." in amounts:
+        start, stop = (float(x) for x in amounts.split("..", 1))
+        if step is None or step == 0:
+            step = DEFAULT_GRID_STEP
+        if not all(math.isfinite(x) for x in (start, stop, step)):
+            raise ValueError("amount range and step must be finite")
+        if stop < start:
+            raise ValueError("amount range must be ascending")
+        if step <= 0:
+            raise ValueError("step must be positive")
+        # Tamaño antes de np.arange ('1..1e12&step=1' no puede reservar memoria);
+        # el +0.5 es el mismo margen de step/2 que usa el arange
+        points = math.floor((stop - start) / step + 0.5) + 1
+        if points > MAX_GRID_POINTS:
+            raise ValueError(f"at most {MAX_GRID_POINTS} amounts per grid")
+        # +step/2 para incluir el extremo sin sufrir por el error de float
+        values = np.arange(start, stop + step / 2, step)
+    else:
+        values = np.array(sorted({float(x) for x in amounts.split(",") if x.strip()}))
+        if not np.isfinite(values).all():
+            raise ValueError("amounts must be finite")
+
+    if len(values) == 0:
+        raise ValueError("no amounts requested")
+    if len(values) > MAX_GRID_POINTS:
+        raise ValueError(f"at most {MAX_GRID_POINTS} amounts per grid")
+    if values[0] <= 0:
+        raise ValueError("amounts must be positive")
+    return np.round(values, 2)
+
+
+class ProviderQuoter:
+    """
+    Adaptador con la interfaz de los scrapers (get_estimate / compare_corridors)
+    sobre un provider × corredor del motor
+    """
+
+    def __init__(self, provider: str, corridor: str = ANY_CORRIDOR, engine: Optional[PricingEngine] = None):
+        self.provider = provider
+        self.corridor = corridor
+        self.engine = engine or get_engine()
+
+    @property
+    def rate_scraper(self):
+        return self.engine.rate_provider
+
+    @property
+    def default_destination(self) -> str:
+        return "MX" if self.corridor == ANY_CORRIDOR else self.corridor
+
+    def get_estimate(self, origin: str = "US", destination: Optional[str] = None, amount: float = 500.0) -> Optional[Dict]:
+        destination = destination or self.default_destination
+        spec = self.engine.table[self.engine.resolve(self.provider, destination, self.corridor)]
+        try:
+            return self.engine.quote(self.provider, origin, destination, amount, corridor=self.corridor)
+        except Exception as e:
+            if spec["format"] == QUOTE:
+                raise
+            label = "WU" if self.provider == "Western Union" else self.provider
+            print(f"Error getting {label} estimate for {self.default_destination}: {str(e)}")
+            return None
+
+    def compare_corridors(self, corridors: List[Dict]) -> List[Dict]:
+        results = []
+        for corridor in corridors:
+            result = self.get_estimate(
+                origin=corridor.get('origin', 'US'),
+                destination=corridor.get('destination', self.default_destination),
+                amount=corridor.get('amount', 500.0)
+            )
+            results.append(result)
+        return results
+
+
+_engine: Optional[PricingEngine] = None
+
+
+def get_engine() -> PricingEngine:
+    """Motor compartido del proceso"""
+    global _engine
+    if _engine is None:
+        _engine = PricingEngine()
+    return _engine
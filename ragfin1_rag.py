@@ -5,19 +5,52 @@ Mario @ MGA - No mocks, no bullshit
 """
 
 import sqlite3
-import anthropic
+import asyncio
+import hashlib
 import os
+import threading
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, AsyncIterator
 import json
 from dataclasses import dataclass
 import numpy as np
 from collections import defaultdict
+from ragfin1_cache import CacheBackend, SQLiteBackend, default_cache_path
+from ragfin1_db import ConnectionManager, ensure_schema
+from ragfin1_snapshot import CorridorSnapshot
 
 # Cargar variables de entorno
 load_dotenv()
 
+# System prompt especializado en remesas
+SYSTEM_PROMPT = """Eres un analista experto en remesas internacionales y competencia de mercado.
+
+Tu trabajo es analizar datos de tasas de cambio y fees de diferentes providers (Wise, Western Union, Intermex) 
+en corredores USA-LatAm.
+
+INSTRUCCIONES:
+1. Analiza los datos proporcionados cuidadosamente
+2. Identifica patrones, tendencias y oportunidades competitivas
+3. Proporciona respuestas precisas con números concretos
+4. Compara providers cuando sea relevante
+5. Calcula costos totales (exchange_rate + fee) para comparaciones justas
+6. Sé directo y conciso - esto es para decisiones de negocio
+
+FORMATO:
+- Usa markdown para estructura
+- Incluye números específicos
+- Destaca insights clave
+- No inventes datos que no estén en el contexto"""
+
+# Respuestas de Claude persistidas (cada una es una llamada a la API)
+ANSWER_CACHE_MAX_ENTRIES = 4096
+
+# Prompt caching: Claude ignora cache_control si el prefijo tiene menos de 1024 tokens
+# (Sonnet). System prompt + un solo corredor son ~400 tokens: el prefijo cacheable lleva
+# además la tabla completa de corredores (~2000 tokens, igual para todas las preguntas
+# mientras no cambien los datos). Los cache_read_input_tokens de cada respuesta se loguean
+MIN_CACHEABLE_TOKENS = 1024
+
 @dataclass
 class ExchangeRecord:
     """Estructura de un registro de tasa de cambio"""
@@ -41,34 +74,195 @@ class ExchangeRecord:
             "corridor": self.corridor
         }
 
+class AnswerCache:
+    """
+    Cache persistente de respuestas de Claude sobre un CacheBackend
+    (SQLite junto a la DB por default, Redis para compartir entre máquinas)
+    La key incluye un hash del contexto: si cambian los datos de corridors
+    la key cambia y la entrada vieja se borra al guardar la nueva
+    """
+    
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_keys(user_query: str,
+                  destination: Optional[str],
+                  provider: Optional[str],
+                  model: str,
+                  max_tokens: int,
+                  context: str) -> Dict[str, str]:
+        """
+        scope_key: la pregunta (normalizada) + filtros + modelo
+        data_hash: hash de los datos que alimentan el contexto
+        """
+        normalized = " ".join(user_query.lower().split())
+        scope = json.dumps([normalized, (destination or "").upper(), provider or "", model, max_tokens])
+        scope_key = hashlib.sha256(scope.encode("utf-8")).hexdigest()
+        data_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+        cache_key = hashlib.sha256(f"{scope_key}:{data_hash}".encode("utf-8")).hexdigest()
+        
+        return {"scope_key": scope_key, "data_hash": data_hash, "cache_key": cache_key}
+    
+    def get(self, keys: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        entry = self.backend.get(f"answer:{keys['cache_key']}")
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return entry[1]
+    
+    def set(self, keys: Dict[str, str], result: Dict[str, Any]):
+        # Los datos cambiaron: la respuesta vieja de este scope ya no vale
+        scope_entry = self.backend.get(f"answer_scope:{keys['scope_key']}")
+        if scope_entry is not None and scope_entry[1] != keys["cache_key"]:
+            self.backend.delete(f"answer:{scope_entry[1]}")
+        
+        self.backend.set(f"answer:{keys['cache_key']}", result)
+        self.backend.set(f"answer_scope:{keys['scope_key']}", keys["cache_key"])
+    
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": round(self.hits / total * 100, 2) if total else 0.0
+        }
+
+
 class RAGEngine:
     """
     Motor RAG para RAGFIN1 - Análisis de inteligencia competitiva
     Usa Claude API para generar insights sobre tasas y fees
     """
     
-    def __init__(self, db_path: str = "ragfin1_data.db", api_key: Optional[str] = None):
+    def __init__(self,
+                 db_path: str = "ragfin1_data.db",
+                 api_key: Optional[str] = None,
+                 cache_backend: Optional[CacheBackend] = None,
+                 answer_backend: Optional[CacheBackend] = None):
         self.db_path = db_path
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         
-        if not self.api_key:
-            raise ValueError("ANTHROPIC_API_KEY no encontrada en environment")
-        
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Clientes de Claude: se crean en el primer uso (importar anthropic es caro)
+        # Sin API key el engine igual sirve datos, snapshot y agregados; solo fallan las queries a Claude
+        self._client = None
+        self._async_client = None
         self.model = "claude-sonnet-4-20250514"
         
-        # Stats para tracking
+        # Tablas de agregados (y backfill si la DB es anterior a ellos) + WAL
+        conn = sqlite3.connect(db_path)
+        ensure_schema(conn)
+        conn.close()
+        
+        # Readers persistentes por thread, read-only
+        self.connections = ConnectionManager(db_path, read_only=True)
+        
+        # Snapshot columnar para el read path (se carga con refresh_snapshot)
+        self.snapshot: Optional[CorridorSnapshot] = None
+        self._snapshot_version: Optional[int] = None
+        self._snapshot_lock = threading.Lock()
+        
+        # Stats para tracking (de este proceso)
         self.total_queries = 0
         self.total_tokens = 0
+        # Deltas todavía no sumados al backend: _build_result corre en el event loop y no puede
+        # hacer I/O; flush_stats() los pasa al backend desde un thread
+        self._stats_lock = threading.Lock()
+        self._pending_stats: Dict[str, int] = defaultdict(int)
+        
+        # Contadores - compartidos si el backend lo es
+        if cache_backend is None:
+            cache_backend = SQLiteBackend(default_cache_path(db_path))
+        self.cache_backend = cache_backend
+        # Respuestas de Claude en su propio backend/tabla: las entradas baratas del cache de
+        # endpoints (muchas keys distintas) no pueden desalojar a las caras
+        if answer_backend is None:
+            answer_backend = SQLiteBackend(
+                default_cache_path(db_path), max_entries=ANSWER_CACHE_MAX_ENTRIES, table="answer_entries"
+            )
+        self.answer_cache = AnswerCache(answer_backend)
         
+    def _require_api_key(self) -> str:
+        if not self.api_key:
+            raise ValueError("ANTHROPIC_API_KEY no encontrada en environment")
+        return self.api_key
+    
+    @property
+    def client(self):
+        if self._client is None:
+            self._require_api_key()
+            import anthropic
+            self._client = anthropic.Anthropic(api_key=self.api_key)
+        return self._client
+    
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._require_api_key()
+            import anthropic
+            self._async_client = anthropic.AsyncAnthropic(api_key=self.api_key)
+        return self._async_client
+    
     def get_connection(self) -> sqlite3.Connection:
-        """Conexión a la base de datos"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Conexión read-only del thread actual (persistente: no cerrarla)"""
+        return self.connections.get()
+    
+    def refresh_snapshot(self, force: bool = False) -> CorridorSnapshot:
+        """
+        Reconstruye el snapshot columnar si la DB cambió (PRAGMA data_version)
+        MAX(id) no alcanza: una DB publicada por el rebuild de otro worker puede tener el mismo MAX(id)
+        El reemplazo es atómico: los requests en curso siguen con el snapshot anterior
+        """
+        # La versión se lee antes de cargar: un commit en el medio fuerza otra recarga, nunca se pierde
+        version = self.connections.data_version()
+        
+        if not force and self.snapshot is not None and self._snapshot_version == version:
+            return self.snapshot
+        
+        # Un solo thread reconstruye; los demás esperan y usan el resultado
+        with self._snapshot_lock:
+            if not force and self.snapshot is not None and self._snapshot_version == version:
+                return self.snapshot
+            
+            snapshot = CorridorSnapshot.from_db(self.get_connection())
+            
+            self.snapshot = snapshot
+            self._snapshot_version = version
+            return snapshot
+    
+    def _current_snapshot(self) -> Optional[CorridorSnapshot]:
+        """
+        Snapshot para el read path, al día con la DB: si entraron datos desde que se construyó
+        se recarga acá (chequear PRAGMA data_version es barato) en vez de esperar al job de agregados
+        None si todavía no se cargó nunca (los callers caen a SQL)
+        """
+        if self.snapshot is None:
+            return None
+        return self.refresh_snapshot()
+    
+    def _records_from_snapshot(self, snapshot: CorridorSnapshot, idx) -> List[ExchangeRecord]:
+        return [
+            ExchangeRecord(
+                provider=snapshot.providers[snapshot.provider_codes[i]],
+                destination=snapshot.destinations[snapshot.destination_codes[i]],
+                exchange_rate=float(snapshot.rate[i]),
+                fee=float(snapshot.fee[i]),
+                timestamp=snapshot.timestamps[i]
+            )
+            for i in idx
+        ]
     
     def load_all_data(self) -> List[ExchangeRecord]:
         """Carga todos los registros de la DB"""
+        snapshot = self._current_snapshot()
+        if snapshot is not None:
+            return self._records_from_snapshot(snapshot, snapshot.select())
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -88,7 +282,6 @@ class RAGEngine:
                 timestamp=row['timestamp']
             ))
         
-        conn.close()
         return records
     
     def filter_data(self, 
@@ -96,6 +289,11 @@ class RAGEngine:
                     provider: Optional[str] = None,
                     limit: Optional[int] = None) -> List[ExchangeRecord]:
         """Filtra datos según criterios"""
+        snapshot = self._current_snapshot()
+        if snapshot is not None:
+            idx = snapshot.select(destination=destination, provider=provider, limit=limit)
+            return self._records_from_snapshot(snapshot, idx)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -127,34 +325,105 @@ class RAGEngine:
                 timestamp=row['timestamp']
             ))
         
-        conn.close()
         return records
     
-    def get_competitive_analysis(self, destination: str) -> Dict:
-        """Análisis competitivo para un país específico"""
-        records = self.filter_data(destination=destination, limit=100)
+    def get_aggregates(self,
+                       destination: Optional[str] = None,
+                       provider: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Stats por (destination, provider) desde corridor_aggregates
+        Suma los buckets de monto: el costo es O(providers), no O(filas)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
-        if not records:
-            return {"error": f"No hay datos para {destination}"}
+        query = """
+            SELECT destination, provider,
+                   SUM(count) AS count,
+                   SUM(sum_rate) AS sum_rate, MIN(min_rate) AS min_rate, MAX(max_rate) AS max_rate,
+                   SUM(sum_fee) AS sum_fee, MIN(min_fee) AS min_fee, MAX(max_fee) AS max_fee,
+                   MAX(last_timestamp) AS last_timestamp
+            FROM corridor_aggregates WHERE 1=1
+        """
+        params = []
+        
+        if destination:
+            query += " AND destination = ?"
+            params.append(destination)
+        
+        if provider:
+            query += " AND provider = ?"
+            params.append(provider)
+        
+        query += " GROUP BY destination, provider ORDER BY destination, provider"
+        
+        cursor.execute(query, params)
+        
+        aggregates = []
+        for row in cursor.fetchall():
+            count = row['count']
+            aggregates.append({
+                "destination": row['destination'],
+                "provider": row['provider'],
+                "count": count,
+                "avg_rate": row['sum_rate'] / count,
+                "min_rate": row['min_rate'],
+                "max_rate": row['max_rate'],
+                "avg_fee": row['sum_fee'] / count,
+                "min_fee": row['min_fee'],
+                "max_fee": row['max_fee'],
+                "last_timestamp": row['last_timestamp']
+            })
+        
+        return aggregates
+    
+    def get_provider_stats(self,
+                           destination: str,
+                           limit: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Count / avg / min / max por provider para un destino
+        Snapshot columnar si está cargado; si no, agregados (o las últimas `limit` filas)
+        """
+        snapshot = self._current_snapshot()
+        if snapshot is not None:
+            return snapshot.provider_stats(snapshot.select(destination=destination, limit=limit))
+        
+        if limit is None:
+            return {agg["provider"]: agg for agg in self.get_aggregates(destination=destination)}
         
-        # Agrupar por provider
         by_provider = defaultdict(list)
-        for rec in records:
+        for rec in self.filter_data(destination=destination, limit=limit):
             by_provider[rec.provider].append(rec)
         
-        # Stats por provider
-        provider_stats = {}
+        stats = {}
         for provider, recs in by_provider.items():
             rates = [r.exchange_rate for r in recs]
-            fees = [r.fee for r in recs]
-            
+            stats[provider] = {
+                "count": len(recs),
+                "avg_rate": float(np.mean(rates)),
+                "min_rate": float(np.min(rates)),
+                "max_rate": float(np.max(rates)),
+                "avg_fee": float(np.mean([r.fee for r in recs]))
+            }
+        return stats
+    
+    def get_competitive_analysis(self, destination: str) -> Dict:
+        """Análisis competitivo para un país específico"""
+        stats = self.get_provider_stats(destination)
+        
+        if not stats:
+            return {"error": f"No hay datos para {destination}"}
+        
+        # Stats por provider
+        provider_stats = {}
+        for provider, st in stats.items():
             provider_stats[provider] = {
-                "avg_rate": np.mean(rates),
-                "min_rate": np.min(rates),
-                "max_rate": np.max(rates),
-                "avg_fee": np.mean(fees),
-                "total_cost": np.mean(rates) + np.mean(fees),
-                "sample_size": len(recs)
+                "avg_rate": st["avg_rate"],
+                "min_rate": st["min_rate"],
+                "max_rate": st["max_rate"],
+                "avg_fee": st["avg_fee"],
+                "total_cost": st["avg_rate"] + st["avg_fee"],
+                "sample_size": st["count"]
             }
         
         # Encontrar el más competitivo (menor total_cost)
@@ -169,7 +438,7 @@ class RAGEngine:
                 "provider": best_provider[0],
                 "total_cost": best_provider[1]['total_cost']
             },
-            "data_points": len(records)
+            "data_points": sum(st["count"] for st in stats.values())
         }
     
     def build_context_for_query(self, 
@@ -180,10 +449,12 @@ class RAGEngine:
         """
         Construye el contexto relevante para una query
         Optimizado para Claude's context window
+        Lee corridor_aggregates (todo el histórico); `limit` se mantiene
+        por compatibilidad pero ya no recorta filas
         """
-        records = self.filter_data(destination=destination, provider=provider, limit=limit)
+        aggregates = self.get_aggregates(destination=destination, provider=provider)
         
-        if not records:
+        if not aggregates:
             return "No hay datos disponibles para los criterios especificados."
         
         # Construir contexto estructurado
@@ -191,36 +462,119 @@ class RAGEngine:
         
         # Header con metadata
         context_parts.append(f"# RAGFIN1 - Datos de Tasas de Cambio")
-        context_parts.append(f"Total registros: {len(records)}")
-        context_parts.append(f"Última actualización: {records[0].timestamp}")
+        context_parts.append(f"Total registros: {sum(agg['count'] for agg in aggregates)}")
+        context_parts.append(f"Última actualización: {max(agg['last_timestamp'] for agg in aggregates)}")
         context_parts.append("")
         
-        # Agrupar por corredor
-        by_corridor = defaultdict(list)
-        for rec in records:
-            by_corridor[rec.corridor].append(rec)
-        
-        for corridor, corridor_recs in by_corridor.items():
-            context_parts.append(f"## {corridor}")
-            
-            # Agrupar por provider dentro del corredor
-            by_provider = defaultdict(list)
-            for rec in corridor_recs:
-                by_provider[rec.provider].append(rec)
+        # Orden determinístico (viene ordenado por destination, provider):
+        # el bloque tiene que ser byte-idéntico para que Claude lo sirva
+        # desde el prompt cache
+        current_destination = None
+        for agg in aggregates:
+            if agg["destination"] != current_destination:
+                current_destination = agg["destination"]
+                context_parts.append(f"## USA-{current_destination}")
             
-            for provider, provider_recs in by_provider.items():
-                rates = [r.exchange_rate for r in provider_recs]
-                fees = [r.fee for r in provider_recs]
-                
-                context_parts.append(f"### {provider}")
-                context_parts.append(f"- Exchange rate promedio: {np.mean(rates):.4f}")
-                context_parts.append(f"- Fee promedio: ${np.mean(fees):.2f}")
-                context_parts.append(f"- Costo total: {np.mean(rates) + np.mean(fees):.2f}")
-                context_parts.append(f"- Registros: {len(provider_recs)}")
-                context_parts.append("")
+            context_parts.append(f"### {agg['provider']}")
+            context_parts.append(f"- Exchange rate promedio: {agg['avg_rate']:.4f}")
+            context_parts.append(f"- Fee promedio: ${agg['avg_fee']:.2f}")
+            context_parts.append(f"- Costo total: {agg['avg_rate'] + agg['avg_fee']:.2f}")
+            context_parts.append(f"- Registros: {agg['count']}")
+            context_parts.append("")
         
         return "\n".join(context_parts)
     
+    def _prepare(self,
+                 user_query: str,
+                 destination: Optional[str] = None,
+                 provider: Optional[str] = None,
+                 max_tokens: int = 4096) -> tuple:
+        """
+        Construye (system_blocks, user_content, cache_keys, cached) para una query
+        Compartido por query(), aquery() y astream_query()
+        """
+        
+        # Prefijo cacheable: system prompt + tabla completa de corredores, idéntico para todas
+        # las preguntas (ver MIN_CACHEABLE_TOKENS)
+        market = self.build_context_for_query(query_type="general")
+        system_blocks = [
+            {"type": "text", "text": SYSTEM_PROMPT},
+            {
+                "type": "text",
+                "text": f"Datos disponibles (todos los corredores):\n\n{market}",
+                "cache_control": {"type": "ephemeral"}
+            }
+        ]
+        
+        # User prompt (variable): el detalle del corredor/provider consultado y la pregunta
+        context = market
+        focus = ""
+        if destination or provider:
+            detail = self.build_context_for_query(
+                query_type="general",
+                destination=destination,
+                provider=provider,
+                limit=100
+            )
+            context = f"{market}\n{detail}"
+            focus = f"Datos del corredor consultado:\n\n{detail}\n\n"
+        
+        user_content = [
+            {
+                "type": "text",
+                "text": f"""{focus}---
+
+Query del usuario: {user_query}
+
+Analiza los datos y responde la pregunta con precisión."""
+            }
+        ]
+
+        cache_keys = AnswerCache.make_keys(
+            user_query, destination, provider, self.model, max_tokens, context
+        )
+        cached = self.answer_cache.get(cache_keys)
+        if cached is not None:
+            cached["metadata"]["cached"] = True
+
+        return system_blocks, user_content, cache_keys, cached
+    
+    def _build_result(self, response) -> Dict[str, Any]:
+        """Extrae la respuesta de Claude y actualiza stats"""
+        
+        # Extraer respuesta
+        answer = response.content[0].text
+        
+        # Stats en memoria (sin I/O: esto corre en el event loop); flush_stats() los suma entre workers
+        input_tokens = response.usage.input_tokens
+        output_tokens = response.usage.output_tokens
+        cache_read_tokens = getattr(response.usage, "cache_read_input_tokens", None) or 0
+        cache_write_tokens = getattr(response.usage, "cache_creation_input_tokens", None) or 0
+        # Para verificar el prompt cache: read en 0 en preguntas repetidas = prefijo no cacheado
+        print(f"🧠 Claude usage: {input_tokens} in / {output_tokens} out, "
+              f"prompt cache read {cache_read_tokens} / write {cache_write_tokens}")
+        with self._stats_lock:
+            self.total_queries += 1
+            self.total_tokens += input_tokens + output_tokens
+            self._pending_stats["total_queries"] += 1
+            self._pending_stats["total_tokens"] += input_tokens + output_tokens
+            self._pending_stats["cache_read_tokens"] += cache_read_tokens
+            self._pending_stats["cache_write_tokens"] += cache_write_tokens
+        
+        return {
+            "success": True,
+            "answer": answer,
+            "metadata": {
+                "model": self.model,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cache_read_input_tokens": cache_read_tokens,
+                "cache_creation_input_tokens": cache_write_tokens,
+                "total_tokens": input_tokens + output_tokens,
+                "query_number": self.total_queries
+            }
+        }
+    
     def query(self, 
               user_query: str,
               destination: Optional[str] = None,
@@ -230,77 +584,63 @@ class RAGEngine:
         Query principal del RAG Engine
         Usa Claude para analizar los datos y responder
         """
-        
-        # Construir contexto
-        context = self.build_context_for_query(
-            query_type="general",
-            destination=destination,
-            provider=provider,
-            limit=100
+        system_blocks, user_content, cache_keys, cached = self._prepare(
+            user_query, destination, provider, max_tokens
         )
-        
-        # System prompt especializado en remesas
-        system_prompt = """Eres un analista experto en remesas internacionales y competencia de mercado.
-
-Tu trabajo es analizar datos de tasas de cambio y fees de diferentes providers (Wise, Western Union, Intermex) 
-en corredores USA-LatAm.
-
-INSTRUCCIONES:
-1. Analiza los datos proporcionados cuidadosamente
-2. Identifica patrones, tendencias y oportunidades competitivas
-3. Proporciona respuestas precisas con números concretos
-4. Compara providers cuando sea relevante
-5. Calcula costos totales (exchange_rate + fee) para comparaciones justas
-6. Sé directo y conciso - esto es para decisiones de negocio
-
-FORMATO:
-- Usa markdown para estructura
-- Incluye números específicos
-- Destaca insights clave
-- No inventes datos que no estén en el contexto"""
-
-        # User prompt con contexto
-        user_prompt = f"""Datos disponibles:
-
-{context}
-
----
-
-Query del usuario: {user_query}
-
-Analiza los datos y responde la pregunta con precisión."""
+        if cached is not None:
+            return cached
 
         try:
             # Llamada a Claude API
             response = self.client.messages.create(
                 model=self.model,
                 max_tokens=max_tokens,
-                system=system_prompt,
+                system=system_blocks,
                 messages=[
-                    {"role": "user", "content": user_prompt}
+                    {"role": "user", "content": user_content}
                 ]
             )
             
-            # Extraer respuesta
-            answer = response.content[0].text
-            
-            # Stats
-            self.total_queries += 1
-            input_tokens = response.usage.input_tokens
-            output_tokens = response.usage.output_tokens
-            self.total_tokens += (input_tokens + output_tokens)
+            result = self._build_result(response)
+            self.answer_cache.set(cache_keys, result)
+            return result
             
+        except Exception as e:
             return {
-                "success": True,
-                "answer": answer,
-                "metadata": {
-                    "model": self.model,
-                    "input_tokens": input_tokens,
-                    "output_tokens": output_tokens,
-                    "total_tokens": input_tokens + output_tokens,
-                    "query_number": self.total_queries
-                }
+                "success": False,
+                "error": str(e),
+                "answer": None
             }
+    
+    async def aquery(self, 
+                     user_query: str,
+                     destination: Optional[str] = None,
+                     provider: Optional[str] = None,
+                     max_tokens: int = 4096) -> Dict[str, Any]:
+        """
+        Versión async de query()
+        No bloquea el event loop mientras Claude responde
+        """
+        # El contexto sale de SQLite (sync) - se arma en un thread
+        system_blocks, user_content, cache_keys, cached = await asyncio.to_thread(
+            self._prepare, user_query, destination, provider, max_tokens
+        )
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.async_client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                system=system_blocks,
+                messages=[
+                    {"role": "user", "content": user_content}
+                ]
+            )
+            
+            result = self._build_result(response)
+            await asyncio.to_thread(self.answer_cache.set, cache_keys, result)
+            return result
             
         except Exception as e:
             return {
@@ -309,20 +649,49 @@ Analiza los datos y responde la pregunta con precisión."""
                 "answer": None
             }
     
-    def competitive_insight(self, destination: str) -> Dict[str, Any]:
+    async def astream_query(self,
+                            user_query: str,
+                            destination: Optional[str] = None,
+                            provider: Optional[str] = None,
+                            max_tokens: int = 4096) -> AsyncIterator[Dict[str, Any]]:
         """
-        Genera un reporte de inteligencia competitiva para un país
-        Usa Claude para análisis profundo
+        Versión streaming de aquery()
+        Emite eventos {"type": "token"} a medida que Claude genera texto
+        y un evento final {"type": "done"} con la metadata de uso
         """
-        
-        # Primero obtener análisis numérico
-        stats = self.get_competitive_analysis(destination)
-        
-        if "error" in stats:
-            return stats
-        
-        # Construir prompt para análisis estratégico
-        query = f"""Analiza la competencia en el corredor USA-{destination}.
+        system_blocks, user_content, cache_keys, cached = await asyncio.to_thread(
+            self._prepare, user_query, destination, provider, max_tokens
+        )
+        if cached is not None:
+            yield {"type": "token", "text": cached["answer"]}
+            yield {"type": "done", "metadata": cached["metadata"]}
+            return
+
+        try:
+            async with self.async_client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                system=system_blocks,
+                messages=[
+                    {"role": "user", "content": user_content}
+                ]
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield {"type": "token", "text": text}
+                
+                response = await stream.get_final_message()
+            
+            # Stats se actualizan solo cuando el stream termina
+            result = self._build_result(response)
+            await asyncio.to_thread(self.answer_cache.set, cache_keys, result)
+            yield {"type": "done", "metadata": result["metadata"]}
+            
+        except Exception as e:
+            yield {"type": "error", "error": str(e)}
+    
+    def _insight_prompt(self, destination: str, stats: Dict) -> str:
+        """Prompt de análisis estratégico para competitive_insight"""
+        return f"""Analiza la competencia en el corredor USA-{destination}.
 
 Datos estadísticos:
 {json.dumps(stats, indent=2)}
@@ -334,9 +703,8 @@ Proporciona:
 4. Tendencias de pricing que observas
 
 Sé específico con números y estrategias accionables."""
-
-        result = self.query(query, destination=destination)
-        
+    
+    def _insight_result(self, destination: str, stats: Dict, result: Dict) -> Dict[str, Any]:
         if result["success"]:
             return {
                 "success": True,
@@ -348,10 +716,56 @@ Sé específico con números y estrategias accionables."""
         else:
             return result
     
-    def compare_providers(self, destination: str, providers: List[str]) -> Dict[str, Any]:
-        """Comparación directa entre providers para un país"""
+    def competitive_insight(self, destination: str) -> Dict[str, Any]:
+        """
+        Genera un reporte de inteligencia competitiva para un país
+        Usa Claude para análisis profundo
+        """
+        
+        # Primero obtener análisis numérico
+        stats = self.get_competitive_analysis(destination)
         
-        query = f"""Compara estos providers en el corredor USA-{destination}: {', '.join(providers)}
+        if "error" in stats:
+            return stats
+        
+        # Construir prompt para análisis estratégico
+        query = self._insight_prompt(destination, stats)
+        result = self.query(query, destination=destination)
+        
+        return self._insight_result(destination, stats, result)
+    
+    async def acompetitive_insight(self, destination: str) -> Dict[str, Any]:
+        """Versión async de competitive_insight()"""
+        stats = await asyncio.to_thread(self.get_competitive_analysis, destination)
+        
+        if "error" in stats:
+            return stats
+        
+        query = self._insight_prompt(destination, stats)
+        result = await self.aquery(query, destination=destination)
+        
+        return self._insight_result(destination, stats, result)
+    
+    async def astream_competitive_insight(self, destination: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versión streaming de acompetitive_insight()
+        El análisis numérico sale primero, luego el texto de Claude
+        """
+        stats = await asyncio.to_thread(self.get_competitive_analysis, destination)
+        
+        if "error" in stats:
+            yield {"type": "error", "error": stats["error"]}
+            return
+        
+        yield {"type": "numerical_analysis", "destination": destination, "data": stats}
+        
+        query = self._insight_prompt(destination, stats)
+        async for event in self.astream_query(query, destination=destination):
+            yield event
+    
+    def _compare_prompt(self, destination: str, providers: List[str]) -> str:
+        """Prompt de comparación directa entre providers"""
+        return f"""Compara estos providers en el corredor USA-{destination}: {', '.join(providers)}
 
 Proporciona:
 1. Tabla comparativa de costos totales (exchange_rate + fee)
@@ -360,15 +774,50 @@ Proporciona:
 4. Gaps de precio entre ellos
 
 Usa los datos reales disponibles."""
-
+    
+    def compare_providers(self, destination: str, providers: List[str]) -> Dict[str, Any]:
+        """Comparación directa entre providers para un país"""
+        query = self._compare_prompt(destination, providers)
         return self.query(query, destination=destination)
     
+    async def acompare_providers(self, destination: str, providers: List[str]) -> Dict[str, Any]:
+        """Versión async de compare_providers()"""
+        query = self._compare_prompt(destination, providers)
+        return await self.aquery(query, destination=destination)
+    
+    def flush_stats(self):
+        """
+        Suma los contadores pendientes en el backend (compartido entre workers)
+        Hace I/O: llamar desde un thread, nunca desde el event loop
+        """
+        with self._stats_lock:
+            pending, self._pending_stats = self._pending_stats, defaultdict(int)
+        
+        try:
+            while pending:
+                name, amount = next(iter(pending.items()))
+                if amount:
+                    self.cache_backend.incr(f"stats:{name}", amount)
+                del pending[name]
+        finally:
+            # Lo que no se pudo sumar vuelve a quedar pendiente
+            with self._stats_lock:
+                for name, amount in pending.items():
+                    self._pending_stats[name] += amount
+    
     def get_stats(self) -> Dict:
-        """Stats del RAG Engine"""
+        """Stats del RAG Engine, sumados entre workers (sync: hace I/O contra el backend)"""
+        self.flush_stats()
+        total_tokens = self.cache_backend.incr("stats:total_tokens", 0)
         return {
-            "total_queries": self.total_queries,
-            "total_tokens": self.total_tokens,
-            "estimated_cost_usd": (self.total_tokens / 1_000_000) * 3.0  # Aproximado para Sonnet
+            "total_queries": self.cache_backend.incr("stats:total_queries", 0),
+            "total_tokens": total_tokens,
+            "estimated_cost_usd": (total_tokens / 1_000_000) * 3.0,  # Aproximado para Sonnet
+            "prompt_cache_read_tokens": self.cache_backend.incr("stats:cache_read_tokens", 0),
+            "prompt_cache_write_tokens": self.cache_backend.incr("stats:cache_write_tokens", 0),
+            "process_queries": self.total_queries,
+            "process_tokens": self.total_tokens,
+            **self.answer_cache.get_stats()
         }
 
 
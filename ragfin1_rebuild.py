@@ -0,0 +1,270 @@
+"""
+RAGFIN1 Blue/Green Rebuild
+Repuebla la DB sin downtime
+- La corrida escribe en un archivo temporal mientras la API sigue leyendo la DB viva
+- Antes de publicar se valida: integridad, conteo contra la DB viva, sanity de tasas/fees y agregados
+- Publicación con la backup API de SQLite en una sola transacción de escritura: los readers (WAL)
+  ven la DB vieja o la nueva completa, nunca una DB vacía ni a medio escribir
+  (un os.replace sobre una DB en WAL dejaría el -wal/-shm viejos aplicándose al archivo nuevo)
+- on_swap() se llama después de publicar para recargar conexiones y snapshot
+- Una reconstrucción a la vez entre todos los workers: lock de archivo en {db_path}.rebuild.lock
+  y archivo temporal único por corrida (mkstemp), así la limpieza solo toca lo propio
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from ragfin1_ingest import IngestProgress
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MIN_ROWS = 1000
+# La DB nueva no puede tener menos de esta fracción de las filas de la viva
+MIN_ROW_RATIO = 0.5
+
+IDLE = "idle"
+RUNNING = "running"
+VALIDATING = "validating"
+SWAPPING = "swapping"
+SUCCESS = "success"
+FAILED = "failed"
+
+
+def _count(conn: sqlite3.Connection, sql: str) -> int:
+    return conn.execute(sql).fetchone()[0]
+
+
+def _remove_db_files(path: str):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _try_lock(path: str) -> Optional[int]:
+    """
+    Lock exclusivo no bloqueante entre procesos. Devuelve el fd (lo libera _unlock) o None si otro lo tiene
+    Lo suelta el SO si el proceso muere: no quedan locks colgados
+    """
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock(fd: int):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def validate_database(path: str,
+                      reference_path: Optional[str] = None,
+                      min_rows: int = MIN_ROWS,
+                      min_row_ratio: float = MIN_ROW_RATIO) -> Dict[str, Any]:
+    """
+    Sanity checks de una DB reconstruida antes de publicarla
+    reference_path: DB viva, para comparar conteo y cobertura de destinos
+    Devuelve {'ok', 'checks', 'errors'}
+    """
+    errors: List[str] = []
+    checks: Dict[str, Any] = {}
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        checks["integrity"] = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if checks["integrity"] != "ok":
+            errors.append(f"quick_check: {checks['integrity']}")
+
+        rows = _count(conn, "SELECT COUNT(*) FROM corridors")
+        checks["rows"] = rows
+        if rows < min_rows:
+            errors.append(f"{rows} rows < minimum {min_rows}")
+
+        invalid = _count(conn, """
+            SELECT COUNT(*) FROM corridors
+            WHERE exchange_rate <= 0 OR fee < 0 OR send_amount <= 0 OR recipient_receives < 0
+        """)
+        checks["invalid_rows"] = invalid
+        if invalid:
+            errors.append(f"{invalid} rows with non-positive rate/amount or negative fee/recipient")
+
+        aggregated = _count(conn, "SELECT COALESCE(SUM(count), 0) FROM corridor_aggregates")
+        checks["aggregated_rows"] = aggregated
+        if aggregated != rows:
+            errors.append(f"corridor_aggregates covers {aggregated} rows, corridors has {rows}")
+
+        destinations = {row[0] for row in conn.execute("SELECT DISTINCT destination FROM corridors")}
+        checks["destinations"] = len(destinations)
+        checks["providers"] = _count(conn, "SELECT COUNT(DISTINCT provider) FROM corridors")
+    finally:
+        conn.close()
+
+    if reference_path and os.path.exists(reference_path):
+        ref = sqlite3.connect(f"file:{reference_path}?mode=ro", uri=True)
+        try:
+            live_rows = _count(ref, "SELECT COUNT(*) FROM corridors")
+            live_destinations = {row[0] for row in ref.execute("SELECT DISTINCT destination FROM corridors")}
+        except sqlite3.OperationalError:
+            # DB viva sin tabla corridors: no hay contra qué comparar
+            live_rows, live_destinations = 0, set()
+        finally:
+            ref.close()
+
+        checks["live_rows"] = live_rows
+        if live_rows and rows < live_rows * min_row_ratio:
+            errors.append(f"{rows} rows < {min_row_ratio:.0%} of live {live_rows}")
+
+        missing = sorted(live_destinations - destinations)
+        checks["missing_destinations"] = missing
+        if missing:
+            errors.append(f"destinations missing vs live: {', '.join(missing)}")
+
+    return {"ok": not errors, "checks": checks, "errors": errors}
+
+
+def publish_database(src_path: str, db_path: str, busy_timeout_ms: int = 30000):
+    """
+    Copia src_path sobre db_path en una sola transacción (sqlite3 backup API)
+    Los readers abiertos siguen con su snapshot hasta su próxima lectura
+    """
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(db_path, timeout=busy_timeout_ms / 1000)
+    try:
+        dst.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode=WAL")
+        # Pasar las páginas nuevas al archivo principal sin esperar a los readers
+        dst.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    finally:
+        dst.close()
+        src.close()
+
+
+class RebuildManager:
+    """
+    Una reconstrucción a la vez (en este proceso y entre workers), en un thread de fondo
+    populate(db_path, progress) llena la DB temporal; status() es seguro desde cualquier thread
+    """
+
+    def __init__(self,
+                 db_path: str,
+                 populate: Callable[[str, IngestProgress], Any],
+                 on_swap: Optional[Callable[[], Any]] = None,
+                 min_rows: int = MIN_ROWS,
+                 min_row_ratio: float = MIN_ROW_RATIO):
+        self.db_path = db_path
+        self.lock_path = f"{db_path}.rebuild.lock"
+        self.tmp_path: Optional[str] = None
+        self.populate = populate
+        self.on_swap = on_swap
+        self.min_rows = min_rows
+        self.min_row_ratio = min_row_ratio
+
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self._lock_fd: Optional[int] = None
+        self.progress: Optional[IngestProgress] = None
+        self.state: Dict[str, Any] = {"status": IDLE}
+
+    def _update(self, **fields):
+        with self.lock:
+            self.state.update(fields)
+
+    def start(self) -> bool:
+        """Lanza la reconstrucción. False si ya hay una en curso (acá o en otro worker)"""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return False
+            lock_fd = _try_lock(self.lock_path)
+            if lock_fd is None:
+                return False
+
+            self._lock_fd = lock_fd
+            self.progress = IngestProgress(0)
+            self.state = {
+                "status": RUNNING,
+                "started_at": datetime.now().isoformat(),
+                "finished_at": None,
+                "duration_seconds": None,
+                "validation": None,
+                "records": None,
+                "error": None
+            }
+            self.thread = threading.Thread(target=self._run, name="ragfin1-rebuild", daemon=True)
+            self.thread.start()
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            state = dict(self.state)
+            progress = self.progress
+        if progress is not None and state["status"] != IDLE:
+            state["progress"] = progress.snapshot()
+        return state
+
+    def _run(self):
+        started = time.monotonic()
+        result: Dict[str, Any] = {}
+        tmp_path = None
+        try:
+            # Archivo vacío = DB SQLite nueva válida
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=os.path.basename(self.db_path) + ".rebuild-",
+                dir=os.path.dirname(os.path.abspath(self.db_path))
+            )
+            os.close(fd)
+            self.tmp_path = tmp_path
+            self.populate(tmp_path, self.progress)
+
+            self._update(status=VALIDATING)
+            validation = validate_database(
+                tmp_path,
+                reference_path=self.db_path,
+                min_rows=self.min_rows,
+                min_row_ratio=self.min_row_ratio
+            )
+            self._update(validation=validation)
+            if not validation["ok"]:
+                raise ValueError("validation failed: " + "; ".join(validation["errors"]))
+
+            self._update(status=SWAPPING)
+            publish_database(tmp_path, self.db_path)
+            records = self.on_swap() if self.on_swap else None
+
+            result = {"status": SUCCESS, "records": records}
+        except Exception as e:
+            print(f"❌ Rebuild failed, live database untouched: {e}")
+            result = {"status": FAILED, "error": str(e)}
+        finally:
+            try:
+                if tmp_path:
+                    _remove_db_files(tmp_path)
+            except OSError as e:
+                print(f"⚠️ Could not remove {tmp_path}: {e}")
+            # Estado final en un solo update: status() nunca ve SUCCESS sin finished_at
+            self._update(
+                **result,
+                finished_at=datetime.now().isoformat(),
+                duration_seconds=round(time.monotonic() - started, 2)
+            )
+            _unlock(self._lock_fd)
+            self._lock_fd = None
@@ -0,0 +1,193 @@
+"""
+RAGFIN1 Refresh Scheduler
+Refresca en background los datos que sirven los endpoints (tasas, crypto, Binance P2P, agregados)
+- Intervalos configurables (env RAGFIN1_REFRESH_<JOB>, en segundos) con jitter para no pegarle
+  a todos los upstreams en el mismo instante
+- Un job nunca se solapa consigo mismo: si la corrida anterior sigue, el tick se salta
+- El resultado de cada job queda en get(name); los handlers solo leen de ahí
+- status() con última corrida, duración, errores y próxima corrida
+- readiness(): un job está "warm" desde su primera corrida buena; los required deciden /ready
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import schedule
+
+DEFAULT_JITTER = 0.1
+TICK_SECONDS = 1.0
+
+
+class RefreshJob:
+    """Un refresh periódico y sus contadores"""
+
+    def __init__(self, name: str, fn: Callable[[], Any], interval: int, jitter: float, required: bool = False):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.jitter = jitter
+        self.required = required
+        self.scheduled: Optional[schedule.Job] = None
+
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_started: Optional[str] = None
+        self.last_finished: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self.last_success: Optional[str] = None
+
+    @property
+    def warm(self) -> bool:
+        return self.last_success is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        next_run = self.scheduled.next_run if self.scheduled else None
+        return {
+            "interval_seconds": self.interval,
+            "required": self.required,
+            "warm": self.warm,
+            "jitter": self.jitter,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_overlaps": self.skipped,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_duration_seconds": self.last_duration,
+            "last_success": self.last_success,
+            "next_run": next_run.isoformat() if next_run else None
+        }
+
+
+class RefreshScheduler:
+    """
+    Scheduler propio (schedule.Scheduler, no el global del módulo) en un thread daemon
+    Cada corrida va en su propio thread para que un job lento no atrase a los demás
+    """
+
+    def __init__(self, tick: float = TICK_SECONDS):
+        self.tick = tick
+        self.scheduler = schedule.Scheduler()
+        self.jobs: Dict[str, RefreshJob] = {}
+        self.values: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self,
+            name: str,
+            fn: Callable[[], Any],
+            interval: int,
+            jitter: float = DEFAULT_JITTER,
+            required: bool = False) -> RefreshJob:
+        """
+        Registra `fn` cada `interval` segundos (± jitter). El env RAGFIN1_REFRESH_<NAME> lo pisa
+        required: la instancia no está lista hasta que este job corra bien una vez
+        """
+        interval = int(os.getenv(f"RAGFIN1_REFRESH_{name.upper()}", interval))
+        job = RefreshJob(name, fn, interval, jitter, required)
+
+        earliest = max(1, int(interval * (1 - jitter)))
+        latest = max(earliest, int(interval * (1 + jitter)))
+        job.scheduled = self.scheduler.every(earliest).to(latest).seconds.do(self.trigger, name)
+
+        self.jobs[name] = job
+        return job
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Último resultado bueno del job (o default si todavía no corrió bien)"""
+        with self.lock:
+            return self.values.get(name, default)
+
+    def trigger(self, name: str) -> bool:
+        """Lanza el job ya. False si la corrida anterior sigue en curso"""
+        job = self.jobs[name]
+        with self.lock:
+            if job.running:
+                job.skipped += 1
+                return False
+            job.running = True
+
+        threading.Thread(target=self._execute, args=(job,), name=f"ragfin1-refresh-{name}", daemon=True).start()
+        return True
+
+    def _execute(self, job: RefreshJob):
+        started = time.monotonic()
+        started_at = datetime.now().isoformat()
+        with self.lock:
+            job.last_started = started_at
+
+        try:
+            value = job.fn()
+        except Exception as e:
+            print(f"⚠️ Refresh {job.name} failed: {e}")
+            with self.lock:
+                job.failures += 1
+                job.last_status = "error"
+                job.last_error = str(e)
+        else:
+            with self.lock:
+                self.values[job.name] = value
+                job.last_status = "ok"
+                job.last_error = None
+                job.last_success = datetime.now().isoformat()
+        finally:
+            with self.lock:
+                job.runs += 1
+                job.last_finished = datetime.now().isoformat()
+                job.last_duration = round(time.monotonic() - started, 3)
+                job.running = False
+
+    def start(self, run_now: bool = True):
+        """Arranca el loop; con run_now cada job corre una vez de inmediato"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        if run_now:
+            for name in self.jobs:
+                self.trigger(name)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="ragfin1-scheduler", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.tick):
+            self.scheduler.run_pending()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def readiness(self) -> Dict[str, Any]:
+        """ready = todos los jobs required ya corrieron bien al menos una vez"""
+        with self.lock:
+            components = {
+                name: {
+                    "warm": job.warm,
+                    "required": job.required,
+                    "running": job.running,
+                    "last_success": job.last_success,
+                    "last_error": job.last_error
+                }
+                for name, job in self.jobs.items()
+            }
+        ready = all(c["warm"] for c in components.values() if c["required"])
+        return {"ready": ready, "components": components}
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "jobs": {name: job.to_dict() for name, job in self.jobs.items()}
+            }
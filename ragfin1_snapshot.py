@@ -0,0 +1,142 @@
+"""
+RAGFIN1 Columnar Snapshot
+Copia en memoria de la tabla corridors en arrays NumPy para el read path
+- rate / fee / amount / ts (epoch) como arrays float
+- provider y destination como códigos enteros (dictionary encoding)
+- filas ordenadas por (destination, timestamp DESC) con offsets por destino
+- orden global por timestamp DESC precalculado (select() sin destino no ordena en cada llamada)
+El snapshot es inmutable: para actualizarlo se construye uno nuevo y se reemplaza
+"""
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def _to_epoch(timestamps: List[str]) -> np.ndarray:
+    try:
+        return np.array(timestamps, dtype="datetime64[us]").astype(np.int64) / 1e6
+    except ValueError:
+        # Algún timestamp raro: parsear uno por uno
+        epochs = []
+        for ts in timestamps:
+            try:
+                epochs.append(datetime.fromisoformat(ts).timestamp())
+            except (TypeError, ValueError):
+                epochs.append(np.nan)
+        return np.array(epochs, dtype=np.float64)
+
+
+class CorridorSnapshot:
+    """Snapshot columnar de corridors"""
+
+    def __init__(self, rows: List[sqlite3.Row], max_id: int = 0):
+        self.max_id = max_id
+        self.built_at = datetime.now().isoformat()
+
+        providers = [row["provider"] for row in rows]
+        destinations = [row["destination"] for row in rows]
+
+        # Dictionary encoding
+        self.providers = sorted(set(providers))
+        self.destinations = sorted(set(destinations))
+        provider_index = {p: i for i, p in enumerate(self.providers)}
+        destination_index = {d: i for i, d in enumerate(self.destinations)}
+
+        provider_codes = np.array([provider_index[p] for p in providers], dtype=np.int32)
+        destination_codes = np.array([destination_index[d] for d in destinations], dtype=np.int32)
+        rate = np.array([row["exchange_rate"] for row in rows], dtype=np.float64)
+        fee = np.array([row["fee"] for row in rows], dtype=np.float64)
+        amount = np.array([row["send_amount"] for row in rows], dtype=np.float64)
+        timestamps = np.array([row["timestamp"] for row in rows], dtype=object)
+        ts = _to_epoch(list(timestamps))
+
+        # Orden: destination ASC, timestamp DESC (NaN al final)
+        order = np.lexsort((-np.nan_to_num(ts, nan=-np.inf), destination_codes))
+
+        self.provider_codes = provider_codes[order]
+        self.destination_codes = destination_codes[order]
+        self.rate = rate[order]
+        self.fee = fee[order]
+        self.amount = amount[order]
+        self.ts = ts[order]
+        self.timestamps = timestamps[order]
+
+        # Offsets por destino: filas [offsets[d], offsets[d + 1])
+        counts = np.bincount(self.destination_codes, minlength=len(self.destinations))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        # Todas las filas por timestamp DESC, una sola vez por snapshot
+        self.recency_order = np.argsort(-np.nan_to_num(self.ts, nan=-np.inf), kind="stable")
+
+        self._provider_index = provider_index
+        self._destination_index = destination_index
+
+    @classmethod
+    def from_db(cls, conn: sqlite3.Connection) -> "CorridorSnapshot":
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("""
+            SELECT id, provider, destination, send_amount, exchange_rate, fee, timestamp
+            FROM corridors
+        """).fetchall()
+        max_id = max((row["id"] for row in rows), default=0)
+        return cls(rows, max_id=max_id)
+
+    def __len__(self) -> int:
+        return len(self.rate)
+
+    def select(self,
+               destination: Optional[str] = None,
+               provider: Optional[str] = None,
+               limit: Optional[int] = None) -> np.ndarray:
+        """
+        Índices de las filas que cumplen el filtro, ordenadas por timestamp DESC
+        Con destination se recorta primero al rango de ese destino (sin escanear el resto)
+        """
+        if destination is not None:
+            d = self._destination_index.get(destination)
+            if d is None:
+                return np.empty(0, dtype=np.int64)
+            idx = np.arange(self.offsets[d], self.offsets[d + 1])
+        else:
+            idx = self.recency_order
+
+        if provider is not None:
+            p = self._provider_index.get(provider)
+            if p is None:
+                return np.empty(0, dtype=np.int64)
+            idx = idx[self.provider_codes[idx] == p]
+
+        if limit:
+            idx = idx[:limit]
+
+        return idx
+
+    def provider_stats(self, idx: np.ndarray) -> Dict[str, Dict[str, Any]]:
+        """Count / avg / min / max de rate y fee por provider, vectorizado"""
+        n = len(self.providers)
+        codes = self.provider_codes[idx]
+        rate = self.rate[idx]
+        fee = self.fee[idx]
+
+        count = np.bincount(codes, minlength=n)
+        sum_rate = np.bincount(codes, weights=rate, minlength=n)
+        sum_fee = np.bincount(codes, weights=fee, minlength=n)
+
+        min_rate = np.full(n, np.inf)
+        max_rate = np.full(n, -np.inf)
+        np.minimum.at(min_rate, codes, rate)
+        np.maximum.at(max_rate, codes, rate)
+
+        stats = {}
+        for p in np.flatnonzero(count):
+            stats[self.providers[p]] = {
+                "count": int(count[p]),
+                "avg_rate": float(sum_rate[p] / count[p]),
+                "min_rate": float(min_rate[p]),
+                "max_rate": float(max_rate[p]),
+                "avg_fee": float(sum_fee[p] / count[p])
+            }
+
+        return stats
@@ -1,45 +1,11 @@
-from datetime import datetime
-from exchangerate_scraper import ExchangeRateScraper
+from ragfin1_pricing import ProviderQuoter
+
+class RemitlyScraperCL(ProviderQuoter):
+    """Precios en ragfin1_pricing.PRICING_TABLE[("Remitly", "CL")]"""
 
-class RemitlyScraperCL:
     def __init__(self):
-        self.provider = "Remitly"
-        self.rate_scraper = ExchangeRateScraper()
-        
-    def get_estimate(self, origin: str, destination: str, amount: float):
-        try:
-            rate_data = self.rate_scraper.get_rate("USD", "CLP", amount)
-            if not rate_data.get("success"):
-                return None
-            real_rate = rate_data["rate"]
-            
-            remitly_markup = 0.975
-            remitly_rate = real_rate * remitly_markup
-            
-            fee = 3.99
-            
-            amount_to_convert = amount - fee
-            recipient_gets = amount_to_convert * remitly_rate
-            effective_rate = recipient_gets / amount if amount > 0 else 0
-            
-            return {
-                "provider": self.provider,
-                "origin": origin,
-                "destination": destination,
-                "origin_currency": "USD",
-                "destination_currency": "CLP",
-                "send_amount": amount,
-                "fee": fee,
-                "exchange_rate": remitly_rate,
-                "recipient_gets": round(recipient_gets, 2),
-                "effective_rate": round(effective_rate, 4),
-                "timestamp": datetime.now().isoformat(),
-                "corridor": f"{origin}-{destination}"
-            }
-            
-        except Exception as e:
-            print(f"Error getting Remitly estimate for CL: {str(e)}")
-            return None
+        super().__init__("Remitly", "CL")
+
 
 if __name__ == "__main__":
     scraper = RemitlyScraperCL()
@@ -1,65 +1,11 @@
-import requests
-from datetime import datetime
-from exchangerate_scraper import ExchangeRateScraper
+from ragfin1_pricing import ProviderQuoter
+
+class WesternUnionScraperDO(ProviderQuoter):
+    """Precios en ragfin1_pricing.PRICING_TABLE[("Western Union", "DO")]"""
 
-class WesternUnionScraperDO:
     def __init__(self):
-        self.provider = "Western Union"
-        self.rate_scraper = ExchangeRateScraper()
-        
-    def get_estimate(self, origin: str, destination: str, amount: float):
-        """
-        Get Western Union estimate for Dominican Republic
-        Origin: US, Destination: DO, Currency: DOP
-        """
-        try:
-            # Get real market rate USD -> DOP
-            rate_data = self.rate_scraper.get_rate("USD", "DOP", amount)
-            if not rate_data.get("success"):
-                return None
-            real_rate = rate_data["rate"]
-            
-            # Western Union markup: 3.5% on rate
-            wu_markup = 0.965  # They give 96.5% of real rate
-            wu_rate = real_rate * wu_markup
-            
-            # Fee structure for DO
-            if amount <= 100:
-                fee = 5.00
-            elif amount <= 300:
-                fee = 8.00
-            elif amount <= 500:
-                fee = 10.00
-            elif amount <= 1000:
-                fee = 15.00
-            else:
-                fee = 20.00
-            
-            # Calculate amounts
-            amount_to_convert = amount - fee
-            recipient_gets = amount_to_convert * wu_rate
-            
-            # Effective rate (what customer actually gets)
-            effective_rate = recipient_gets / amount if amount > 0 else 0
-            
-            return {
-                "provider": self.provider,
-                "origin": origin,
-                "destination": destination,
-                "origin_currency": "USD",
-                "destination_currency": "DOP",
-                "send_amount": amount,
-                "fee": fee,
-                "exchange_rate": wu_rate,
-                "recipient_gets": round(recipient_gets, 2),
-                "effective_rate": round(effective_rate, 2),
-                "timestamp": datetime.now().isoformat(),
-                "corridor": f"{origin}-{destination}"
-            }
-            
-        except Exception as e:
-            print(f"Error getting WU estimate for DO: {str(e)}")
-            return None
+        super().__init__("Western Union", "DO")
+
 
 # Test
 if __name__ == "__main__":
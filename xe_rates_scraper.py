@@ -1,7 +1,7 @@
 """
 XE.com Real Exchange Rates
 """
-import requests
+import ragfin1_http
 import os
 from dotenv import load_dotenv
 from datetime import datetime
@@ -26,7 +26,7 @@ class XERatesScraper:
                 "Authorization": f"Basic {self.api_key}"
             }
             
-            response = requests.get(self.base_url, params=params, headers=headers, timeout=10)
+            response = ragfin1_http.get(self.base_url, params=params, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()